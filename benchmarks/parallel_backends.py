@@ -0,0 +1,89 @@
+"""Compare the execution backends of pot-create --jobs.
+
+Generates a tree of Python sources and templates in a temporary directory,
+then times a full extraction for every available backend and job count:
+
+    python benchmarks/parallel_backends.py --files 2000 --jobs 1 2 4 8
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from lingva.extract import extract
+from lingva.parallel import BACKENDS, backend_available
+
+PYTHON_SOURCE = """\
+from gettext import gettext as _
+
+
+def view_{i}(request, count):
+    # Shown on the overview page
+    title = _("Overview {i}")
+    items = ngettext("{{n}} item", "{{n}} items", count)
+    return {{"title": title, "items": items, "label": _("Shared label")}}
+"""
+
+TEMPLATE_SOURCE = """\
+<html xmlns:i18n="http://xml.zope.org/namespaces/i18n" i18n:domain="bench">
+  <h1 i18n:translate="">Page {i}</h1>
+  <p i18n:translate="">Hello <span i18n:name="who">${{name}}</span></p>
+  <a title="Edit page" i18n:attributes="title">x</a>
+</html>
+"""
+
+
+def make_tree(root, files, large_file=0):
+    if large_file:
+        # A generated module that sorts last, to show the effect of scheduling.
+        with open(os.path.join(root, "zzz_generated.py"), "w") as f:
+            f.write("".join(PYTHON_SOURCE.format(i=i) for i in range(large_file)))
+    for i in range(files):
+        directory = os.path.join(root, f"pkg{i % 20}")
+        os.makedirs(directory, exist_ok=True)
+        if i % 4:
+            filename, source = f"module{i}.py", PYTHON_SOURCE * 10
+        else:
+            filename, source = f"page{i}.pt", TEMPLATE_SOURCE * 10
+        with open(os.path.join(directory, filename), "w") as f:
+            f.write(source.format(i=i))
+
+
+def run(root, jobs, backend):
+    start = time.perf_counter()
+    extract(
+        sources=[root],
+        output=os.path.join(root, f"{backend}-{jobs}.pot"),
+        quiet=True,
+        keywords=[],
+        jobs=jobs,
+        backend=backend,
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=1000, help="Number of source files")
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4], help="Job counts")
+    parser.add_argument("--repeat", type=int, default=3, help="Best of this many runs")
+    parser.add_argument(
+        "--large-file", type=int, default=0, help="Add one module with this many functions"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        make_tree(root, args.files, args.large_file)
+        print(f"{'backend':<12} {'jobs':>4} {'seconds':>8}")
+        for backend in BACKENDS:
+            if not backend_available(backend):
+                print(f"{backend:<12} not available")
+                continue
+            for jobs in args.jobs:
+                best = min(run(root, jobs, backend) for _ in range(args.repeat))
+                print(f"{backend:<12} {jobs:>4} {best:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import asyncio
+import collections
+
+from lingva.extract import (
+    create_catalog,
+    finish_catalog,
+    list_files,
+    load_extractors,
+    no_duplicates,
+)
+from lingva.extractors import ExtractionSession, extract_file, get_extractor
+from lingva.sources import SourceBuffer
+
+# Number of files to read ahead while an earlier file is being parsed.
+PREFETCH = 8
+
+
+class ExtractionError(Exception):
+    """Extracting messages failed.
+
+    Details of parse errors have been written to stderr by the extractor.
+    """
+
+
+def _guarded(message, func, *args):
+    try:
+        return func(*args)
+    except SystemExit as e:  # lingva reports errors and exits
+        raise ExtractionError(message) from e
+
+
+def _read_source(filename, extractor):
+    if extractor.source_mode is None:
+        return None
+    return SourceBuffer(filename)
+
+
+def _close_source(future):
+    if not future.cancelled() and future.exception() is None and future.result() is not None:
+        future.result().close()
+
+
+async def aiter_messages(sources, options, cfg_file=None, executor=None, prefetch=PREFETCH):
+    """Extract messages from files and directories without blocking the event loop.
+
+    Reading files and running extractors happens in ``executor``, or the
+    loop's default executor if None. The extractors are loaded for this call
+    only, so the global registries are not used or changed. ``options`` is
+    an :class:`ExtractorOptions` instance; pass an :class:`ExtractionSession` to
+    parse the keyword specs only once. Up to ``prefetch`` files are read
+    while the extractor runs on an earlier file. Messages are yielded in file
+    order.
+
+    Cancelling stops the extraction after the extractor call that is running;
+    its result is discarded. Raises :class:`ExtractionError` if a file can
+    not be processed.
+    """
+    loop = asyncio.get_running_loop()
+    extractors, extensions = await loop.run_in_executor(
+        executor, _guarded, "Invalid configuration", load_extractors, cfg_file
+    )
+    filenames = await loop.run_in_executor(
+        executor,
+        _guarded,
+        "Invalid source",
+        lambda: list(no_duplicates(list_files(None, sources, None, extractors, extensions))),
+    )
+    filenames = iter(filenames)
+    pending = collections.deque()
+
+    def read_ahead():
+        while len(pending) < prefetch:
+            filename = next(filenames, None)
+            if filename is None:
+                return
+            extractor = get_extractor(filename, extractors, extensions)
+            if extractor is None:
+                future = loop.create_future()
+                future.set_exception(
+                    ExtractionError(f"No extractor available for file {filename}")
+                )
+            else:
+                future = loop.run_in_executor(executor, _read_source, filename, extractor)
+            pending.append((filename, extractor, future))
+
+    try:
+        read_ahead()
+        while pending:
+            filename, extractor, future = pending.popleft()
+            source = await future
+            read_ahead()
+            messages = await loop.run_in_executor(
+                executor,
+                _guarded,
+                f"Can not extract messages from {filename}",
+                extract_file,
+                extractor,
+                filename,
+                options,
+                source,
+            )
+            for message in messages:
+                yield message
+    finally:
+        # Reads that are still running are not cancelled, so their buffers
+        # can be closed when they finish.
+        for _, _, future in pending:
+            future.add_done_callback(_close_source)
+
+
+async def extract_async(
+    sources,
+    cfg_file=None,
+    location=True,
+    linenumbers=True,
+    width=79,
+    sort_order=None,
+    domain=None,
+    keywords=None,
+    comment_tag=None,
+    comments=True,
+    max_occurrences=None,
+    copyright_holder=None,
+    package_name="PACKAGE",
+    package_version="1.0",
+    msgid_bugs_address=None,
+    executor=None,
+):
+    """Extract translatable strings and return the catalog.
+
+    This takes the same options as ``extract``, but does not write the
+    catalog and does not touch the global extractor registries.
+    """
+    if comment_tag is None:
+        comment_tag = True
+    keep_linenumbers = location and (linenumbers or sort_order == "location")
+    # Invalid keyword specs make the session exit.
+    options = _guarded(
+        "Invalid keyword",
+        ExtractionSession,
+        comment_tag,
+        domain,
+        list(keywords or []),
+        keep_linenumbers,
+        comments,
+    )
+    catalog = create_catalog(
+        width, copyright_holder, package_name, package_version, msgid_bugs_address
+    )
+    if sort_order == "location":
+        catalog.record_locations()
+    async for message in aiter_messages(sources, options, cfg_file, executor):
+        catalog.add_message(message, add_occurrences=location, linenumbers=keep_linenumbers)
+    await asyncio.get_running_loop().run_in_executor(
+        executor,
+        finish_catalog,
+        catalog,
+        sort_order,
+        keep_linenumbers and not linenumbers,
+        max_occurrences,
+    )
+    return catalog
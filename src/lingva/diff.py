@@ -0,0 +1,137 @@
+import json
+import sys
+
+import click
+
+from lingva.extract import _format_key, entry_as_json, read_summary
+
+
+def read_catalog(filename):
+    """Read a PO, POT or JSON Lines file into entries keyed on msgid and msgctxt.
+
+    The entries are dictionaries as written by ``pot-create --format jsonl``.
+    Returns None if the file can not be read.
+    """
+    output_format = "jsonl" if filename.endswith(".jsonl") else "po"
+    summary = read_summary(filename, output_format)
+    if summary is not None and output_format == "po":
+        summary = {key: entry_as_json(entry) for (key, entry) in summary.items()}
+    return summary
+
+
+def _occurrence(occurrence):
+    filename, line = occurrence
+    return f"{filename}:{line}" if line else filename
+
+
+def _changed_set(old, new):
+    old_set = set(old)
+    new_set = set(new)
+    added = [item for item in new if item not in old_set]
+    removed = [item for item in old if item not in new_set]
+    if added or removed:
+        return {"added": added, "removed": removed}
+    return None
+
+
+def compare_entries(old, new, ignore_occurrences=False):
+    """Return what changed between two versions of an entry, by field."""
+    changes = {}
+    if old["msgid_plural"] != new["msgid_plural"]:
+        changes["msgid_plural"] = {"old": old["msgid_plural"], "new": new["msgid_plural"]}
+    flags = _changed_set(old["flags"], new["flags"])
+    if flags:
+        changes["flags"] = flags
+    # Comments may have been wrapped at a different width.
+    if " ".join(old["comments"]).split() != " ".join(new["comments"]).split():
+        changes["comments"] = {"old": old["comments"], "new": new["comments"]}
+    if not ignore_occurrences:
+        occurrences = _changed_set(
+            [_occurrence(o) for o in old["occurrences"]],
+            [_occurrence(o) for o in new["occurrences"]],
+        )
+        if occurrences:
+            changes["occurrences"] = occurrences
+    return changes
+
+
+def compare_catalogs(old, new, ignore_occurrences=False):
+    """Compare two catalogs read by `read_catalog`.
+
+    Returns a list of ``(kind, key, changes)`` tuples: ``+`` for added
+    messages, ``-`` for removed messages and ``~`` for changed messages, with
+    the changes as returned by `compare_entries`. Added and changed messages
+    are in the order of the new catalog, followed by the removed messages.
+    """
+    diff = []
+    for key, entry in new.items():
+        if key not in old:
+            diff.append(("+", key, None))
+            continue
+        changes = compare_entries(old[key], entry, ignore_occurrences)
+        if changes:
+            diff.append(("~", key, changes))
+    diff.extend(("-", key, None) for key in old if key not in new)
+    return diff
+
+
+def format_text(diff):
+    for kind, key, changes in diff:
+        yield f"{kind} {_format_key(key)}"
+        if not changes:
+            continue
+        for field in ["flags", "occurrences"]:
+            if field in changes:
+                items = [f"+{item}" for item in changes[field]["added"]]
+                items += [f"-{item}" for item in changes[field]["removed"]]
+                yield f"    {field}: {' '.join(items)}"
+        if "msgid_plural" in changes:
+            old = json.dumps(changes["msgid_plural"]["old"], ensure_ascii=False)
+            new = json.dumps(changes["msgid_plural"]["new"], ensure_ascii=False)
+            yield f"    msgid_plural: {old} -> {new}"
+        if "comments" in changes:
+            yield "    comments changed"
+
+
+def format_json(diff):
+    kinds = {"+": "added", "-": "removed", "~": "changed"}
+    for kind, (msgid, msgctxt), changes in diff:
+        data = {"change": kinds[kind], "msgctxt": msgctxt, "msgid": msgid}
+        if changes:
+            data.update(changes)
+        yield json.dumps(data, ensure_ascii=False)
+
+
+@click.command()
+@click.argument("old", type=click.Path(exists=True, dir_okay=False))
+@click.argument("new", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--ignore-occurrences",
+    is_flag=True,
+    default=False,
+    help="Do not report changed source locations",
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["text", "jsonl"]),
+    default="text",
+    help="Output format: readable text, or one JSON object per message",
+)
+def main(old, new, ignore_occurrences, output_format):
+    """Show the messages that differ between two PO, POT or JSON Lines files.
+
+    The exit code is 0 if there are no differences and 1 if there are.
+    """
+    catalogs = []
+    for filename in [old, new]:
+        catalog = read_catalog(filename)
+        if catalog is None:
+            click.echo(f"Can not read {filename}", err=True)
+            sys.exit(2)
+        catalogs.append(catalog)
+    diff = compare_catalogs(*catalogs, ignore_occurrences=ignore_occurrences)
+    for line in (format_json if output_format == "jsonl" else format_text)(diff):
+        click.echo(line)
+    if diff:
+        sys.exit(1)
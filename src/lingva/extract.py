@@ -1,18 +1,44 @@
+import filecmp
+import fnmatch
+import heapq
+import itertools
+import json
 import os
 import re
 import sys
 import tempfile
+import time
 from collections import OrderedDict
 from configparser import ConfigParser as SafeConfigParser
 from datetime import datetime
-from operator import attrgetter
+from operator import attrgetter, itemgetter
 
 import click
 import polib
 
 from lingva import __version__
-from lingva.extractors import EXTENSIONS, EXTRACTORS, get_extractor, register_extractors
+from lingva.extractors import (  # noqa: F401 - ExtractorOptions is part of this module's API
+    EXTENSIONS,
+    EXTRACTORS,
+    ExtractionSession,
+    ExtractorOptions,
+    get_extractor,
+    register_extractors,
+)
 from lingva.extractors.babel import register_babel_plugins
+from lingva.index import MessageIndex
+from lingva.parallel import (
+    BACKENDS,
+    backend_available,
+    extract_batch,
+    extract_batch_in_worker,
+    extract_in_worker,
+    imap_ordered,
+    init_worker,
+    unpack_messages,
+)
+from lingva.watchdog import extract_files_within
+from lingva.writer import iter_po
 
 
 def po_timestamp():
@@ -20,10 +46,20 @@ def po_timestamp():
     return f"{now:%Y-%m-%d %H:%M%z}"
 
 
-def _same_text(a, b):
-    a = re.sub(r"\s+", " ", a)
-    b = re.sub(r"\s+", " ", b)
-    return a == b
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize_comment(comment):
+    # polib drops empty comment lines at the start and end when it reads a
+    # file, so those do not count as a difference.
+    return _WHITESPACE.sub(" ", comment).strip()
+
+
+def _comment_fingerprint(entry):
+    """Return the comments of an entry with runs of whitespace collapsed."""
+    if isinstance(entry, POEntry):
+        return entry.comment_fingerprint
+    return (_normalize_comment(entry.comment), _normalize_comment(entry.tcomment))
 
 
 class POEntry(polib.POEntry):
@@ -31,6 +67,8 @@ class POEntry(polib.POEntry):
         polib.POEntry.__init__(self, *a, **kw)
         self._comments = []
         self._tcomments = []
+        self._fingerprint = ("", "")
+        self._fingerprint_sizes = (0, 0)
 
     @property
     def comment(self):
@@ -52,23 +90,156 @@ class POEntry(polib.POEntry):
         r = super().__eq__(other)
         if not r:
             return False
-        return _same_text(other.comment, self.comment) and _same_text(
-            other.tcomment, self.tcomment
+        return self.comment_fingerprint == _comment_fingerprint(other)
+
+    @property
+    def comment_fingerprint(self):
+        """The comments and translator comments with runs of whitespace collapsed.
+
+        `update` and `limit_occurrences` keep this up to date, so comparing
+        entries does not normalize their comments again. Comments appended
+        to the lists directly are picked up on the next access.
+        """
+        if self._fingerprint_sizes != (len(self._comments), len(self._tcomments)):
+            self._update_fingerprint()
+        return self._fingerprint
+
+    def _update_fingerprint(self):
+        self._fingerprint = (
+            _normalize_comment("\n".join(self._comments)),
+            _normalize_comment("\n".join(self._tcomments)),
         )
+        self._fingerprint_sizes = (len(self._comments), len(self._tcomments))
 
-    def update(self, message, add_occurrences=True):
+    def update(self, message, add_occurrences=True, linenumbers=True):
         if add_occurrences:
-            self.occurrences.append((message.location[0], str(message.location[1])))
+            if linenumbers:
+                self.occurrences.append((message.location[0], str(message.location[1])))
+            elif not self.occurrences or self.occurrences[-1][0] != message.location[0]:
+                # Messages from a file arrive together, so this is enough to
+                # avoid listing a file more than once.
+                self.occurrences.append((message.location[0], ""))
         self.flags.extend(f for f in message.flags if f not in self.flags)
+        changed = False
         if message.comment not in self._comments:
             self._comments.append(message.comment)
+            changed = True
         if message.tcomment not in self._tcomments:
             self._tcomments.append(message.tcomment)
+            changed = True
+        if changed:
+            self._update_fingerprint()
+
+    def limit_occurrences(self, limit):
+        """Keep only the first ``limit`` occurrences, in location order.
+
+        The total number of occurrences is recorded in an extracted comment.
+        """
+        total = len(self.occurrences)
+        if total <= limit:
+            return
+        self.occurrences = heapq.nsmallest(limit, self.occurrences, key=_occurrence_sort_key)
+        self._comments = [comment for comment in self._comments if comment]
+        self._comments.append(f"Used in {total} locations, only the first {limit} are listed")
+        self._update_fingerprint()
+
+
+def _occurrence_sort_key(occurrence):
+    filename, line = occurrence
+    return (filename, int(line) if line else 0)
+
+
+def _merge_runs(runs):
+    """Merge runs of ``(filename, lineno, entry)`` sorted by location.
+
+    Runs that do not overlap are concatenated; only overlapping runs are
+    merged with a heap.
+    """
+    runs.sort(key=lambda run: run[0][:2])
+    group = []
+    group_end = None
+    for run in runs:
+        if group and run[0][:2] < group_end:
+            group.append(run)
+            group_end = max(group_end, run[-1][:2])
+            continue
+        if len(group) == 1:
+            yield from group[0]
+        elif group:
+            yield from heapq.merge(*group, key=itemgetter(0, 1))
+        group = [run]
+        group_end = run[-1][:2]
+    if len(group) == 1:
+        yield from group[0]
+    elif group:
+        yield from heapq.merge(*group, key=itemgetter(0, 1))
 
 
 class POFile(polib.POFile):
     copyright_holder = None
     package_name = None
+    _locations = None
+
+    def __init__(self, *a, **kw):
+        polib.POFile.__init__(self, *a, **kw)
+        self._index = {}
+
+    def record_locations(self):
+        """Remember message locations as they are added, for sort_by_location."""
+        self._locations = []
+
+    def add_message(self, message, add_occurrences=True, linenumbers=True):
+        """Add a message, merging it into the entry for the same msgid."""
+        key = (message.msgctxt, message.msgid)
+        entry = self._index.get(key)
+        if entry is None:
+            entry = POEntry(msgctxt=message.msgctxt, msgid=message.msgid)
+            if message.msgid_plural:
+                entry.msgid_plural = message.msgid_plural
+                entry.msgstr_plural[0] = ""
+                entry.msgstr_plural[1] = ""
+            self.append(entry)
+            self._index[key] = entry
+        entry.update(message, add_occurrences=add_occurrences, linenumbers=linenumbers)
+        if add_occurrences and self._locations is not None:
+            self._locations.append((message.location[0], message.location[1], entry))
+        return entry
+
+    def sort_by_location(self):
+        """Order entries by their occurrences.
+
+        This gives the same order as sorting on :func:`_location_sort_key`.
+        Extractors report messages in file order, so the recorded locations
+        form a few sorted runs which are merged instead of sorting every
+        entry's occurrences.
+        """
+        runs = []
+        run = []
+        for location in self._locations or ():
+            if run and location[:2] < run[-1][:2]:
+                runs.append(run)
+                run = []
+            run.append(location)
+        if run:
+            runs.append(run)
+
+        catalog_order = {id(entry): i for (i, entry) in enumerate(self)}
+        ordered = [entry for entry in self if not entry.occurrences]
+        seen = set(map(id, ordered))
+        for _, group in itertools.groupby(_merge_runs(runs), key=itemgetter(0, 1)):
+            first_seen = []
+            for entry in map(itemgetter(2), group):
+                if id(entry) not in seen:
+                    seen.add(id(entry))
+                    first_seen.append(entry)
+            if len(first_seen) > 1:
+                # Entries sharing their first location are ordered by the rest.
+                first_seen.sort(key=lambda e: (_location_sort_key(e), catalog_order[id(e)]))
+            ordered.extend(first_seen)
+        if len(ordered) != len(self):  # Some locations were not recorded.
+            self.sort(key=_location_sort_key)
+        else:
+            self[:] = ordered
 
     def metadata_as_entry(self):
         entry = polib.POFile.metadata_as_entry(self)
@@ -93,7 +264,103 @@ def no_duplicates(iterator):
         yield item
 
 
-def list_files(files_from, sources):
+SNAPSHOT_VERSION = 1
+# A directory changed this close to the moment it was listed may have changed
+# again within the same timestamp tick, so its recorded listing is not trusted.
+_RACY_INTERVAL_NS = 2_000_000_000
+
+
+def _scan_directory(path):
+    dirnames = []
+    filenames = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if not is_dir:
+                filenames.append(entry.name)
+            elif not entry.is_symlink():  # os.walk does not follow links either
+                dirnames.append(entry.name)
+    return dirnames, filenames
+
+
+class DirectorySnapshot:
+    """Directory listings recorded by a previous run.
+
+    Listings are keyed by the absolute directory path and only reused while
+    the directory mtime is unchanged.
+    """
+
+    def __init__(self, path, rescan=False):
+        self.path = path
+        self.previous = {} if rescan else self._load(path)
+        self.current = {}
+
+    @staticmethod
+    def _load(path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != SNAPSHOT_VERSION:
+            return {}
+        return data.get("directories", {})
+
+    def listdir(self, path):
+        """Return the subdirectories and files in a directory."""
+        key = os.path.abspath(path)
+        mtime = os.stat(path).st_mtime_ns
+        state = self.previous.get(key)
+        if (
+            state is None
+            or state["mtime"] != mtime
+            or state["scanned"] - mtime < _RACY_INTERVAL_NS
+        ):
+            dirnames, filenames = _scan_directory(path)
+            state = {
+                "mtime": mtime,
+                "scanned": time.time_ns(),
+                "dirs": dirnames,
+                "files": filenames,
+            }
+        self.current[key] = state
+        return state["dirs"], state["files"]
+
+    def save(self):
+        if self.current == self.previous:
+            return
+        data = {"version": SNAPSHOT_VERSION, "directories": self.current}
+        fd, tmpfile = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)))
+        with open(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmpfile, self.path)
+
+
+def walk_directory(top, snapshot=None):
+    """Walk a directory tree top-down, like :func:`os.walk`.
+
+    With a snapshot, directories whose mtime has not changed reuse their
+    recorded listing instead of being read again.
+    """
+    if snapshot is None:
+        for dirpath, dirnames, filenames in os.walk(top):
+            yield dirpath, filenames
+        return
+    stack = [top]
+    while stack:
+        dirpath = stack.pop()
+        try:
+            dirnames, filenames = snapshot.listdir(dirpath)
+        except OSError:
+            continue
+        yield dirpath, filenames
+        stack.extend(os.path.join(dirpath, name) for name in reversed(dirnames))
+
+
+def list_files(files_from, sources, snapshot=None, extractors=None, extensions=None):
     if files_from:
         for filename in files_from:
             if filename.startswith("#") or not filename.strip():
@@ -103,9 +370,9 @@ def list_files(files_from, sources):
         if os.path.isfile(file):
             yield file
         elif os.path.isdir(file):
-            for dirpath, dirnames, filenames in os.walk(file):
+            for dirpath, filenames in walk_directory(file, snapshot):
                 for file in filenames:
-                    if get_extractor(file) is not None:
+                    if get_extractor(file, extractors, extensions) is not None:
                         yield os.path.join(dirpath, file)
         else:
             click.echo(f"Invalid file type for {file}", err=True)
@@ -156,26 +423,34 @@ def create_catalog(width, copyright_holder, package_name, package_version, msgid
     return catalog
 
 
-def _register_extension(extension, extractor):
-    if extractor not in EXTRACTORS:
+def _register_extension(extension, extractor, extractors, extensions):
+    if extractor not in extractors:
         click.echo(
             f"Unknown extractor {extractor}. Check --list-extractors for available options",
             err=True,
         )
         sys.exit(1)
-    EXTENSIONS[extension] = extractor
+    extensions[extension] = extractor
+
 
+def read_config(cfg_file, extractors=None, extensions=None):
+    """Apply a configuration file to the extractor registries.
 
-def read_config(cfg_file):
+    ``extractors`` and ``extensions`` default to the global registries.
+    """
+    if extractors is None:
+        extractors = EXTRACTORS
+    if extensions is None:
+        extensions = EXTENSIONS
     config = SafeConfigParser()
     config.read_file(cfg_file)
     for section in config.sections():
         if section == "extensions":
             for extension, extractor in config.items(section):
-                _register_extension(extension, extractor)
+                _register_extension(extension, extractor, extractors, extensions)
         elif section.startswith("extractor:"):
             extractor = section[10:]
-            if extractor not in EXTRACTORS:
+            if extractor not in extractors:
                 click.echo(
                     f"Unknown extractor {extractor}. "
                     "Check --list-extractors for available options",
@@ -183,7 +458,7 @@ def read_config(cfg_file):
                 )
                 sys.exit(1)
             extractor_config = dict(config.items(section))
-            EXTRACTORS[extractor].update_config(**extractor_config)
+            extractors[extractor].update_config(**extractor_config)
         elif section.startswith("extension"):
             click.echo(
                 f'Use of {section} section is obsolete. Please use the "extensions" section.',
@@ -193,7 +468,33 @@ def read_config(cfg_file):
             plugin = config.get(section, "plugin")
             if not plugin:
                 click.echo(f"No plugin defined for extension {extension}", err=True)
-            _register_extension(extension, plugin)
+            _register_extension(extension, plugin, extractors, extensions)
+
+
+def read_user_config(cfg_file=None, extractors=None, extensions=None):
+    """Read ``cfg_file``, or the user's global configuration file if there is one."""
+    if cfg_file:
+        read_config(cfg_file, extractors, extensions)
+        return
+    user_home = os.path.expanduser("~")
+    global_config = os.path.join(user_home, ".config", "lingva")
+    if os.path.exists(global_config):
+        with open(global_config) as f:
+            read_config(f, extractors, extensions)
+
+
+def load_extractors(cfg_file=None):
+    """Return new, configured extractor and extension registries.
+
+    Unlike ``extract`` this does not touch the global registries, so the
+    result can be used next to other extractions in the same process.
+    """
+    extractors = {}
+    extensions = {}
+    register_extractors(extractors, extensions)
+    register_babel_plugins(extractors)
+    read_user_config(cfg_file, extractors, extensions)
+    return extractors, extensions
 
 
 def _summarise(catalog):
@@ -212,17 +513,167 @@ def identical(a, b):
     return a == b
 
 
+def _mkstemp_for(output):
+    output_dir = os.path.dirname(output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    return tempfile.mkstemp(dir=output_dir, text=True)
+
+
+def entry_as_json(entry):
+    """Return a JSON-serialisable dictionary for a catalog entry."""
+    return {
+        "msgctxt": entry.msgctxt,
+        "msgid": entry.msgid,
+        "msgid_plural": entry.msgid_plural or None,
+        "flags": entry.flags,
+        "comments": [comment for comment in entry.comment.split("\n") if comment],
+        "occurrences": [
+            [filename, int(line) if line else None] for (filename, line) in entry.occurrences
+        ],
+    }
+
+
+def write_jsonl(catalog, output, quiet=False):
+    """Write a catalog as JSON Lines, unless it is identical to the existing file."""
+    fd, tmpfile = _mkstemp_for(output)
+    with open(fd, "w", encoding="utf-8", newline="\n") as f:
+        for entry in catalog:
+            f.write(json.dumps(entry_as_json(entry), ensure_ascii=False))
+            f.write("\n")
+    if os.path.exists(output) and filecmp.cmp(tmpfile, output, shallow=False):
+        os.unlink(tmpfile)
+        if not quiet:
+            click.echo(f"No changes found - not replacing {output}")
+        return
+    os.replace(tmpfile, output)
+
+
+def write_catalog(catalog, output, quiet=False, output_format="po"):
+    """Write a catalog, unless it is identical to the existing file."""
+    if output_format == "jsonl":
+        write_jsonl(catalog, output, quiet)
+        return
+    if os.path.exists(output):
+        old_catalog: POFile | None = None
+        try:
+            old_catalog = polib.pofile(output)
+        except (OSError, UnicodeDecodeError):
+            pass
+        if old_catalog is not None and identical(catalog, old_catalog):
+            if not quiet:
+                click.echo(f"No changes found - not replacing {output}")
+            return
+        os.unlink(output)
+    fd, tmpfile = _mkstemp_for(output)
+    with open(fd, "w", encoding=catalog.encoding) as f:
+        f.writelines(iter_po(catalog))
+    os.rename(tmpfile, output)
+
+
+def read_summary(output, output_format="po"):
+    """Read the messages in an existing output file, keyed on msgid and msgctxt.
+
+    Returns None if the file does not exist or can not be read.
+    """
+    if not os.path.exists(output):
+        return None
+    try:
+        if output_format == "jsonl":
+            summary = {}
+            with open(output, encoding="utf-8") as f:
+                for line in f:
+                    data = json.loads(line)
+                    summary[(data["msgid"], data["msgctxt"])] = data
+            return summary
+        return _summarise(polib.pofile(output))
+    except (OSError, UnicodeDecodeError, ValueError, KeyError):
+        return None
+
+
+def _format_key(key):
+    msgid, msgctxt = key
+    text = f'msgid "{polib.escape(msgid)}"'
+    if msgctxt is not None:
+        text = f'msgctxt "{polib.escape(msgctxt)}" {text}'
+    return text
+
+
+def check_catalog(catalog, expected, output_format="po"):
+    """Compare a catalog with the summary of an existing output file.
+
+    Returns a list of differences: ``+`` for new messages, ``-`` for messages
+    that are no longer used and ``~`` for messages whose locations, flags or
+    comments changed.
+    """
+    diff = []
+    current = _summarise(catalog)
+    for key, entry in current.items():
+        if key not in expected:
+            diff.append(f"+ {_format_key(key)}")
+        elif not (entry_as_json(entry) if output_format == "jsonl" else entry) == expected[key]:
+            # polib's __ne__ ignores comments, so use our __eq__.
+            diff.append(f"~ {_format_key(key)}")
+    diff.extend(f"- {_format_key(key)}" for key in expected if key not in current)
+    return diff
+
+
+def parse_output_map(output_map):
+    """Parse ``PATTERN=FILE`` items into a list of (pattern, file) pairs."""
+    targets = []
+    for item in output_map:
+        pattern, sep, output = item.partition("=")
+        if not sep or not pattern or not output:
+            click.echo(f"Invalid output mapping {item}, expected PATTERN=FILE", err=True)
+            sys.exit(1)
+        targets.append((os.path.normpath(pattern).replace(os.sep, "/"), output))
+    return targets
+
+
+def match_output(filename, targets):
+    """Return the output file for a source file, or None if nothing matches.
+
+    A pattern containing glob characters is matched against the whole path,
+    other patterns match a directory prefix. The first match wins.
+    """
+    path = os.path.normpath(filename).replace(os.sep, "/")
+    for pattern, output in targets:
+        if any(c in pattern for c in "*?["):
+            if fnmatch.fnmatchcase(path, pattern):
+                return output
+        elif path == pattern or path.startswith(pattern.rstrip("/") + "/"):
+            return output
+    return None
+
+
 def _location_sort_key(msg):
     locations = [(fn, int(line)) for (fn, line) in msg.occurrences]
     locations.sort()  # Sort so first occurence is always used.
     return locations
 
 
-class ExtractorOptions:
-    def __init__(self, comment_tag, domain, keywords):
-        self.comment_tag = comment_tag
-        self.domain = domain
-        self.keywords = keywords
+def _source_size(item):
+    # Extraction time grows with the file size, so use it to schedule work.
+    try:
+        return os.path.getsize(item[1])
+    except OSError:
+        return 0
+
+
+def finish_catalog(catalog, sort_order=None, strip=False, max_occurrences=None):
+    """Sort a catalog and drop the occurrence details that should not be written."""
+    if sort_order == "msgid":
+        catalog.sort(key=attrgetter("msgid"))
+    elif sort_order == "location":
+        catalog.sort_by_location()
+
+    if strip:
+        for entry in catalog:
+            strip_linenumbers(entry)
+
+    if max_occurrences:
+        for entry in catalog:
+            entry.limit_occurrences(max_occurrences)
 
 
 def extract(
@@ -245,6 +696,18 @@ def extract(
     package_name="PACKAGE",
     package_version="1.0",
     msgid_bugs_address=None,
+    snapshot=None,
+    rescan=False,
+    comments=True,
+    output_map=None,
+    max_occurrences=None,
+    output_format="po",
+    check=False,
+    jobs=1,
+    backend="thread",
+    timeout=None,
+    keep_going=False,
+    index=None,
 ):
     """Extract translatable strings."""
     register_extractors()
@@ -257,78 +720,178 @@ def extract(
             click.echo(f"{extractor:<17} {EXTRACTORS[extractor].__doc__ or ''}")
         return
 
-    if cfg_file:
-        read_config(cfg_file)
-    else:
-        user_home = os.path.expanduser("~")
-        global_config = os.path.join(user_home, ".config", "lingva")
-        if os.path.exists(global_config):
-            read_config(open(global_config))
+    read_user_config(cfg_file)
 
-    catalog = create_catalog(
-        width, copyright_holder, package_name, package_version, msgid_bugs_address
-    )
+    targets = parse_output_map(output_map) if output_map else None
+    catalogs = {}
+    for target in [target for (_, target) in targets] if targets else [output]:
+        if target not in catalogs:
+            catalogs[target] = catalog = create_catalog(
+                width, copyright_holder, package_name, package_version, msgid_bugs_address
+            )
+            if sort_order == "location":
+                catalog.record_locations()
+    if not targets:
+        catalog = catalogs[output]
 
+    expected = {}
+    if check:
+        for target in catalogs:
+            expected[target] = read_summary(target, output_format)
+            if expected[target] is None:
+                click.echo(f"Can not read {target}", err=True)
+                sys.exit(1)
+
+    # Sorting by file needs the line numbers, even if they are not written.
+    keep_linenumbers = location and (linenumbers or sort_order == "location")
     scanned = 0
     if directory and not isinstance(directory, list):
         directory = list(directory)
-    for filename in no_duplicates(list_files(files_from, sources)):
-        real_filename = find_file(filename, directory)
-        if real_filename is None:
-            click.echo(f"Can not find file {filename}", err=True)
-            sys.exit(1)
-        extractor = get_extractor(real_filename)
-        if extractor is None:
-            click.echo(f"No extractor available for file {filename}", err=True)
-            sys.exit(1)
+    directory_snapshot = DirectorySnapshot(snapshot, rescan) if snapshot else None
+    extractor_options = ExtractionSession(
+        comment_tag=comment_tag,
+        domain=domain,
+        keywords=keywords,
+        # The index records line numbers even if the catalog does not.
+        linenumbers=keep_linenumbers or bool(index and not check),
+        comments=comments,
+        parallel=jobs > 1,
+    )
+
+    def source_files():
+        for filename in no_duplicates(list_files(files_from, sources, directory_snapshot)):
+            real_filename = find_file(filename, directory)
+            if real_filename is None:
+                click.echo(f"Can not find file {filename}", err=True)
+                sys.exit(1)
+            target = match_output(real_filename, targets) if targets else output
+            if target is None:
+                if not quiet:
+                    click.echo(f"No output for {filename}, skipping", err=True)
+                continue
+            if get_extractor(real_filename) is None:
+                click.echo(f"No extractor available for file {filename}", err=True)
+                sys.exit(1)
+            yield target, real_filename
+
+    def extract_in_order(items):
+        # Runs of files with the same extractor share the extractor setup.
+        for extractor, run in itertools.groupby(items, key=lambda item: get_extractor(item[1])):
+            run = list(run)
+            filenames = [filename for (_, filename) in run]
+            yield from zip(
+                run,
+                extract_files_within(extractor, filenames, extractor_options, timeout, keep_going),
+            )
+
+    def extract_items(items):
+        filenames = [filename for (_, filename) in items]
+        return extract_batch(filenames, get_extractor, extractor_options, timeout, keep_going)
 
-        extractor_options = ExtractorOptions(
-            comment_tag=comment_tag,
-            domain=domain,
-            keywords=keywords,
+    if timeout and jobs > 1 and backend != "process" and not quiet:
+        click.echo(
+            f"--timeout can not interrupt {backend} workers, files that take "
+            "longer are only reported; use --backend=process to enforce it",
+            err=True,
+        )
+    if jobs == 1:
+        results = extract_in_order(source_files())
+    elif backend == "thread":
+        results = imap_ordered(
+            lambda item: extract_items([item])[0],
+            source_files(),
+            jobs,
+            cost=_source_size,
+            batch_func=extract_items,
+        )
+    else:
+        if not backend_available(backend):
+            click.echo(f"The {backend} backend is not available in this Python version", err=True)
+            sys.exit(1)
+        # Workers build their own registry from the configuration loaded here.
+        configs = {name: extractor.config for (name, extractor) in EXTRACTORS.items()}
+        results = (
+            (item, (None if packed is None else unpack_messages(packed), problem))
+            for (item, (packed, problem)) in imap_ordered(
+                extract_in_worker,
+                source_files(),
+                jobs,
+                backend=backend,
+                initializer=init_worker,
+                initargs=(dict(EXTENSIONS), configs, extractor_options, timeout, keep_going),
+                cost=_source_size,
+                batch_func=extract_batch_in_worker,
+            )
         )
-        for message in extractor(real_filename, extractor_options):
-            entry = catalog.find(message.msgid, msgctxt=message.msgctxt)
-            if entry is None:
-                entry = POEntry(msgctxt=message.msgctxt, msgid=message.msgid)
-                if message.msgid_plural:
-                    entry.msgid_plural = message.msgid_plural
-                    entry.msgstr_plural[0] = ""
-                    entry.msgstr_plural[1] = ""
-                catalog.append(entry)
-            entry.update(message, add_occurrences=location)
+    message_index = None
+    if index and not check:
+        try:
+            message_index = MessageIndex(index)
+        except ValueError as e:
+            click.echo(e, err=True)
+            sys.exit(1)
+    skipped = 0
+    for (target, filename), (messages, problem) in results:
+        if problem:
+            click.echo(problem, err=True)
+        if messages is None:
+            if not keep_going:
+                sys.exit(1)
+            skipped += 1
+            continue
+        if message_index is not None:
+            messages = list(messages)
+            extractor = EXTENSIONS[os.path.splitext(filename)[1]]
+            message_index.update_file(filename, messages, extractor, domain)
+        catalog = catalogs[target]
+        for message in messages:
+            if check and (message.msgid, message.msgctxt) not in expected[target]:
+                # No need to look any further: the output is out of date.
+                click.echo(f"{target} is out of date:", err=True)
+                click.echo(
+                    f"+ {_format_key((message.msgid, message.msgctxt))}"
+                    f"  ({message.location[0]}:{message.location[1]})",
+                    err=True,
+                )
+                sys.exit(1)
+            catalog.add_message(message, add_occurrences=location, linenumbers=keep_linenumbers)
         scanned += 1
+    if directory_snapshot is not None and not check:
+        directory_snapshot.save()
+    if message_index is not None:
+        message_index.close()
     if not scanned:
         click.echo("No files scanned, aborting", err=True)
         sys.exit(1)
-    if not catalog and not allow_empty:
-        click.echo("No translatable strings found, aborting", err=True)
-        sys.exit(2)
 
-    if sort_order == "msgid":
-        catalog.sort(key=attrgetter("msgid"))
-    elif sort_order == "location":
-        catalog.sort(key=_location_sort_key)
+    out_of_date = False
+    for target, catalog in catalogs.items():
+        if not catalog and not allow_empty:
+            if not targets:
+                click.echo("No translatable strings found, aborting", err=True)
+                sys.exit(2)
+            click.echo(f"No translatable strings found for {target}, skipping", err=True)
+            continue
 
-    if not linenumbers:
-        for entry in catalog:
-            strip_linenumbers(entry)
+        finish_catalog(catalog, sort_order, keep_linenumbers and not linenumbers, max_occurrences)
 
-    if os.path.exists(output):
-        old_catalog: POFile | None = None
-        try:
-            old_catalog = polib.pofile(output)
-        except (OSError, UnicodeDecodeError):
-            pass
-        if old_catalog is not None and identical(catalog, old_catalog):
-            if not quiet:
-                click.echo(f"No changes found - not replacing {output}")
-            return
-        os.unlink(output)
-    fd, tmpfile = tempfile.mkstemp(dir=os.path.dirname(output), text=True)
-    with open(fd, "w", encoding=catalog.encoding) as f:
-        f.write(catalog.__unicode__())
-    os.rename(tmpfile, output)
+        if check:
+            diff = check_catalog(catalog, expected[target], output_format)
+            if diff:
+                click.echo(f"{target} is out of date:", err=True)
+                for line in diff:
+                    click.echo(line, err=True)
+                out_of_date = True
+            elif not quiet:
+                click.echo(f"{target} is up to date")
+            continue
+
+        write_catalog(catalog, target, quiet, output_format)
+
+    if skipped:
+        click.echo(f"Skipped {skipped} files", err=True)
+    if out_of_date or skipped:
+        sys.exit(1)
 
 
 @click.command()
@@ -358,6 +921,50 @@ def extract(
 )
 @click.argument("sources", nargs=-1, type=click.Path(exists=True))
 @click.option("--list-extractors", is_flag=True, help="List all known extraction plugins")
+@click.option(
+    "-j",
+    "--jobs",
+    metavar="NUMBER",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of workers used to extract messages",
+)
+@click.option(
+    "--backend",
+    type=click.Choice(BACKENDS),
+    default="thread",
+    help="Run --jobs workers as threads, processes or subinterpreters",
+)
+@click.option(
+    "--timeout",
+    metavar="SECONDS",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Abort extracting a file after SECONDS (without --jobs or with --backend=process)",
+)
+@click.option(
+    "--keep-going",
+    is_flag=True,
+    default=False,
+    help="Skip files that fail or time out instead of aborting",
+)
+@click.option(
+    "--index",
+    metavar="FILE",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Record in the SQLite database FILE where each message is used",
+)
+@click.option(
+    "--snapshot",
+    metavar="FILE",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Reuse directory listings recorded in FILE for unchanged directories",
+)
+@click.option(
+    "--rescan",
+    is_flag=True,
+    default=False,
+    help="Ignore the directory snapshot and list all directories again",
+)
 @click.option(
     "-q",
     "--quiet",
@@ -375,6 +982,20 @@ def extract(
     default="messages.pot",
     help="Filename for generated POT file",
 )
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["po", "jsonl"]),
+    default="po",
+    help="Write a POT file, or JSON Lines with one object per message",
+)
+@click.option(
+    "-O",
+    "--output-map",
+    metavar="PATTERN=FILE",
+    multiple=True,
+    help="Write messages from files matching PATTERN to FILE instead of the output file",
+)
 @click.option(
     "--add-location/--no-location",
     "location",
@@ -386,6 +1007,12 @@ def extract(
     default=True,
     help="Include line numbers in location information",
 )
+@click.option(
+    "--max-occurrences",
+    metavar="NUMBER",
+    type=click.IntRange(min=1),
+    help="List at most NUMBER locations for a message",
+)
 @click.option("-w", "--width", metavar="NUMBER", default=79, help="Output width")
 @click.option(
     "-s",
@@ -424,6 +1051,13 @@ def extract(
     metavar="TAG",
     help="Add comments prefixed by TAG to messages, or all if no tag is given",
 )
+@click.option(
+    "--no-comments",
+    "comments",
+    flag_value=False,
+    default=True,
+    help="Do not add extracted comments to messages",
+)
 # POT metadata
 @click.option(
     "--copyright-holder",
@@ -443,6 +1077,12 @@ def extract(
     help="Package version to use in the generated POT file",
 )
 @click.option("--msgid-bugs-address", metavar="EMAIL", help="Email address bugs should be send to")
+@click.option(
+    "--check",
+    is_flag=True,
+    default=False,
+    help="Verify that the output files are up to date instead of writing them",
+)
 def main(
     cfg_file,
     files_from,
@@ -463,6 +1103,18 @@ def main(
     package_name,
     package_version,
     msgid_bugs_address,
+    snapshot,
+    rescan,
+    comments,
+    output_map,
+    max_occurrences,
+    output_format,
+    check,
+    jobs,
+    backend,
+    timeout,
+    keep_going,
+    index,
 ):
     """Main entrypoint."""
     extract(
@@ -485,6 +1137,18 @@ def main(
         package_name,
         package_version,
         msgid_bugs_address,
+        snapshot,
+        rescan,
+        comments,
+        output_map,
+        max_occurrences,
+        output_format,
+        check,
+        jobs,
+        backend,
+        timeout,
+        keep_going,
+        index,
     )
 
 
@@ -1,10 +1,12 @@
 import abc
 import collections
+import functools
 import os
 import re
 import sys
 from importlib.metadata import entry_points
 
+from ..sources import SourceBuffer
 from .compat import add_metaclass
 
 Message = collections.namedtuple(
@@ -15,14 +17,55 @@ EXTRACTORS = {}
 EXTENSIONS = {}
 
 
-def get_extractor(filename):
+def get_extractor(filename, extractors=None, extensions=None):
+    """Return the extractor for a file.
+
+    ``extractors`` and ``extensions`` default to the global registries.
+    """
+    if extractors is None:
+        extractors = EXTRACTORS
+    if extensions is None:
+        extensions = EXTENSIONS
     ext = os.path.splitext(filename)[1]
     try:
-        return EXTRACTORS[EXTENSIONS[ext]]
+        return extractors[extensions[ext]]
     except KeyError:
         return None
 
 
+def extract_file(extractor, filename, options, source=None):
+    """Return the messages an extractor finds in a file, as a list.
+
+    ``source`` is a `SourceBuffer` for the file if it was read already. It is
+    closed when the extractor is done.
+    """
+    if extractor.source_mode is None:
+        return list(extractor(filename, options))
+    if source is None:
+        source = SourceBuffer(filename)
+    with source:
+        return list(extractor(filename, options, source.open(extractor.source_mode)))
+
+
+def extract_files(extractor, filenames, options):
+    """Yield the messages an extractor finds in each file, as lists.
+
+    This uses `Extractor.extract_many`, so the extractor can share its setup
+    between the files. Every file is read when the extractor asks for it and
+    closed when it asks for the next one.
+    """
+
+    def files():
+        for filename in filenames:
+            if extractor.source_mode is None:
+                yield filename, None
+            else:
+                with SourceBuffer(filename) as source:
+                    yield filename, source.open(extractor.source_mode)
+
+    return extractor.extract_many(files(), options)
+
+
 # Based on http://www.cplusplus.com/reference/cstdio/printf/
 # Note that we skip the space-flag in this list, since this creates too
 # many false positives.
@@ -39,14 +82,6 @@ _C_FORMAT = re.compile(
 )
 
 
-def check_c_format(buf, flags):
-    if "no-c-format" in flags or "c-format" in flags:
-        return
-    formats = list(re.finditer("%(?!%)", buf))
-    if formats and all(_C_FORMAT.match(buf[m.start() :]) is not None for m in formats):
-        flags.append("c-format")
-
-
 # Based on http://docs.python.org/2/library/string.html#format-string-syntax
 _PYTHON_FORMAT = re.compile(
     r"""
@@ -60,11 +95,86 @@ _PYTHON_FORMAT = re.compile(
 )
 
 
-def check_python_format(buf, flags):
-    if "no-python-format" in flags or "python-format" in flags:
+#: Number of strings whose format flags are remembered by `detect_formats`.
+FORMAT_CACHE_SIZE = 4096
+
+#: Format flags detected in messages, in the order they are added:
+#: ``flag -> (start characters, directive pattern, require_all)``.
+FORMATS = {}
+_format_scanner = None
+
+
+def register_format(flag, start, directive, require_all=False):
+    """Detect another format flag in messages.
+
+    ``start`` holds the characters that can start a directive and
+    ``directive`` the compiled pattern for a whole directive at that
+    position. With ``require_all`` every start character must begin a valid
+    directive, otherwise one valid directive is enough.
+    """
+    FORMATS[flag] = (start, directive, require_all)
+    _formats_changed()
+
+
+def unregister_format(flag):
+    del FORMATS[flag]
+    _formats_changed()
+
+
+def _formats_changed():
+    global _format_scanner
+    chars = "".join(sorted({c for (start, _, _) in FORMATS.values() for c in start}))
+    _format_scanner = re.compile(f"[{re.escape(chars)}]") if chars else None
+    detect_formats.cache_clear()
+
+
+@functools.lru_cache(maxsize=FORMAT_CACHE_SIZE)
+def detect_formats(buf):
+    """Return the format flags that apply to a string, as a tuple.
+
+    All formats are checked in a single scan for their start characters.
+    """
+    if _format_scanner is None:
+        return ()
+    found = set()
+    failed = set()
+    for m in _format_scanner.finditer(buf):
+        pos = m.start()
+        char = buf[pos]
+        for flag, (start, directive, require_all) in FORMATS.items():
+            if char not in start or flag in failed or (flag in found and not require_all):
+                continue
+            if directive.match(buf, pos) is not None:
+                found.add(flag)
+            elif require_all:
+                failed.add(flag)
+    return tuple(flag for flag in FORMATS if flag in found and flag not in failed)
+
+
+def check_formats(buf, flags):
+    """Add the format flags for a string, unless they or their negation are set."""
+    for flag in detect_formats(buf):
+        if flag not in flags and f"no-{flag}" not in flags:
+            flags.append(flag)
+
+
+def _check_format(flag, buf, flags):
+    if flag in flags or f"no-{flag}" in flags:
         return
-    if _PYTHON_FORMAT.search(buf) is not None:
-        flags.append("python-format")
+    if flag in detect_formats(buf):
+        flags.append(flag)
+
+
+def check_c_format(buf, flags):
+    _check_format("c-format", buf, flags)
+
+
+def check_python_format(buf, flags):
+    _check_format("python-format", buf, flags)
+
+
+register_format("c-format", "%", _C_FORMAT, require_all=True)
+register_format("python-format", "{", _PYTHON_FORMAT)
 
 
 def check_comment_flags(comment):
@@ -138,9 +248,100 @@ def update_keywords(keywords, specs):
         keywords[kw.function] = kw
 
 
+KEYWORDS = {
+    "gettext": Keyword("gettext"),
+    "ugettext": Keyword("ugettext"),
+    "dgettext": Keyword("dgettext", 2, domain_param=1),
+    "ldgettext": Keyword("ldgettext", 2, domain_param=1),
+    "ngettext": Keyword("ngettext", 1, 2),
+    "lngettext": Keyword("ngettext", 1, 2),
+    "ungettext": Keyword("ungettext", 1, 2),
+    "dngettext": Keyword("dngettext", 2, 3, domain_param=1),
+    "ldngettext": Keyword("dngettext", 2, 3, domain_param=1),
+    "pgettext": Keyword("pgettext", 2, msgctxt_param=1),
+}
+
+
+def get_keywords(specs):
+    """Return the default keywords updated with keyword specs."""
+    keywords = KEYWORDS.copy()
+    update_keywords(keywords, specs)
+    return keywords
+
+
+class ExtractorOptions:
+    """Options passed to extractors.
+
+    ``linenumbers`` and ``comments`` tell extractors which parts of a message
+    will be used, so they can skip the work for the other parts.
+    """
+
+    def __init__(self, comment_tag, domain, keywords, linenumbers=True, comments=True):
+        self.comment_tag = comment_tag
+        self.domain = domain
+        self.keywords = keywords
+        self.linenumbers = linenumbers
+        self.comments = comments
+
+
+class ExtractionSession(ExtractorOptions):
+    """Extractor options resolved once for a whole extraction run.
+
+    The keyword specs are parsed into ``keyword_table`` and the comment tag
+    into ``comment_mode`` when the session is created, instead of for every
+    file. Extractors must treat a session as read-only, so one session can be
+    shared by all files and threads of a run.
+
+    ``parallel`` is set if the run already extracts several files at once.
+    Extractors then do not start workers of their own.
+    """
+
+    def __init__(
+        self, comment_tag, domain, keywords, linenumbers=True, comments=True, parallel=False
+    ):
+        super().__init__(comment_tag, domain, keywords, linenumbers, comments)
+        self.keyword_table = get_keywords(keywords or [])
+        self.comment_mode = get_comment_mode(comments, comment_tag)
+        self.parallel = parallel
+
+
+def get_comment_mode(comments, comment_tag):
+    """Return which comments to extract: ``"all"``, ``"tagged"`` or ``"none"``."""
+    if not comments or comment_tag is None:
+        return "none"
+    if comment_tag is True:
+        return "all"
+    return "tagged"
+
+
+def keywords_for(options):
+    """Return the keyword table for extractor options."""
+    if isinstance(options, ExtractionSession):
+        return options.keyword_table
+    return get_keywords(options.keywords)
+
+
+def comment_mode_for(options):
+    """Return which comments to extract for extractor options."""
+    if isinstance(options, ExtractionSession):
+        return options.comment_mode
+    return get_comment_mode(options.comments, options.comment_tag)
+
+
 @add_metaclass(abc.ABCMeta)
 class Extractor:
+    """Base class for extractors.
+
+    A registered extractor instance can be called from several threads at
+    once. Extractors that keep parse state on ``self`` do so on a new
+    instance for every call.
+    """
+
     default_config = {}
+    #: How ``extract`` should open source files for this extractor: ``"rb"``
+    #: for a binary or ``"r"`` for a text file object, passed as ``fileobj``.
+    #: If None the extractor opens files itself.
+    source_mode = None
 
     def __init__(self, config=None):
         self.config = self.default_config.copy()
@@ -158,8 +359,40 @@ class Extractor:
     def __call__(self, filename, options, fileobj=None, lineno=0):
         raise NotImplementedError()
 
+    def extract_many(self, files, options):
+        """Extract messages from several files.
+
+        ``files`` yields ``(filename, fileobj)`` pairs, where fileobj is None
+        unless the extractor sets `source_mode`. Yields a list of messages
+        for every file, in order. Extractors can override this to do their
+        setup once for all files.
+        """
+        for filename, fileobj in files:
+            if fileobj is None:
+                yield list(self(filename, options))
+            else:
+                yield list(self(filename, options, fileobj))
+
+    def split_source(self, source, options):
+        """Split a text source into parts that can be extracted on their own.
+
+        Returns a list of ``(first, end)`` line ranges, with ``end``
+        excluded, that cover the source in order, or None if the source can
+        not be split. Extracting every part separately, with ``lineno`` set
+        to the line before the part, gives the messages of the whole source.
+        """
+        return None
+
+
+def register_extractors(extractors=None, extensions=None):
+    """Register all installed extractors.
 
-def register_extractors():
+    ``extractors`` and ``extensions`` default to the global registries.
+    """
+    if extractors is None:
+        extractors = EXTRACTORS
+    if extensions is None:
+        extensions = EXTENSIONS
     try:
         extractor_entry_points = entry_points(group="lingva.extractors")
     except TypeError:  # <= Python 3.9
@@ -173,6 +406,6 @@ def register_extractors():
         if extractor:
             if not issubclass(extractor, Extractor):
                 raise ValueError("Registered extractor must derive from ``Extractor``")
-            EXTRACTORS[entry_point.name] = extractor()
+            extractors[entry_point.name] = extractor()
             for extension in extractor.extensions:
-                EXTENSIONS[extension] = entry_point.name
+                extensions[extension] = entry_point.name
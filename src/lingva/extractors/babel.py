@@ -1,30 +1,49 @@
 from importlib.metadata import entry_points
 
-from . import EXTRACTORS, Extractor, Message, check_c_format, check_python_format, update_keywords
-from .python import KEYWORDS, parse_keyword
+from . import (
+    EXTRACTORS,
+    Extractor,
+    Message,
+    check_formats,
+    keywords_for,
+)
+from .python import parse_keyword
 
 
 class BabelExtractor(Extractor):
     extensions = []
+    source_mode = "rb"
     extractor = None
     default_config = {
         "comment-tags": "",
     }
 
     def __call__(self, filename, options, fileobj=None, firstline=0):
-        self.keywords = KEYWORDS.copy()
-        update_keywords(self.keywords, options.keywords)
-        if fileobj is None:
-            fileobj = open(filename, "rb")
+        keywords = keywords_for(options)
+        comment_tags = self.config["comment-tags"].split()
+        return self._extract(filename, options, fileobj, firstline, keywords, comment_tags)
+
+    def extract_many(self, files, options):
+        keywords = keywords_for(options)
         comment_tags = self.config["comment-tags"].split()
-        messages = self.extractor(fileobj, list(self.keywords.keys()), comment_tags, self.config)
+        for filename, fileobj in files:
+            yield list(self._extract(filename, options, fileobj, 0, keywords, comment_tags))
+
+    def _extract(self, filename, options, fileobj, firstline, keywords, comment_tags):
+        if fileobj is None:
+            with open(filename, "rb") as fileobj:
+                yield from self._extract(
+                    filename, options, fileobj, firstline, keywords, comment_tags
+                )
+            return
+        messages = self.extractor(fileobj, list(keywords.keys()), comment_tags, self.config)
         for lineno, function, args, comment in messages:
             if not isinstance(args, (list, tuple)):
                 args = [args]
-            if function in self.keywords:
+            if function in keywords:
                 args = [(None, a, lineno) for a in args]
                 domain, msgctxt, msgid, msgid_plural, c = parse_keyword(
-                    args, self.keywords[function], filename, lineno
+                    args, keywords[function], filename, lineno
                 )
                 if c:
                     comment.append(c)
@@ -32,12 +51,11 @@ class BabelExtractor(Extractor):
                 msgid = args[0]
                 domain = msgctxt = msgid_plural = None
 
-            if domain and self.options.domain and domain != self.options.domain:
+            if domain and options.domain and domain != options.domain:
                 continue
-            comment = " ".join(comment)
+            comment = " ".join(comment) if options.comments else ""
             flags = []
-            check_c_format(msgid, flags)
-            check_python_format(msgid, flags)
+            check_formats(msgid, flags)
             yield Message(
                 msgctxt,
                 msgid,
@@ -49,7 +67,9 @@ class BabelExtractor(Extractor):
             )
 
 
-def register_babel_plugins():
+def register_babel_plugins(extractors=None):
+    if extractors is None:
+        extractors = EXTRACTORS
     babel_entry_points = entry_points(group="babel.extractors")
     for entry_point in babel_entry_points:
         try:
@@ -66,4 +86,4 @@ def register_babel_plugins():
                     "__doc__": extractor.__doc__.splitlines()[0],
                 },
             )
-            EXTRACTORS[f"babel-{name}"] = cls()
+            extractors[f"babel-{name}"] = cls()
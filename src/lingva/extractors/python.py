@@ -1,32 +1,25 @@
 import ast
+import bisect
+import concurrent.futures
+import contextlib
+import functools
 import io
+import re
 import sys
 import tokenize
 import warnings
 
 from . import (
+    KEYWORDS,
+    ExtractionSession,
     Extractor,
-    Keyword,
     Message,
-    check_c_format,
     check_comment_flags,
-    check_python_format,
-    update_keywords,
+    check_formats,
+    comment_mode_for,
+    keywords_for,
 )
 
-KEYWORDS = {
-    "gettext": Keyword("gettext"),
-    "ugettext": Keyword("ugettext"),
-    "dgettext": Keyword("dgettext", 2, domain_param=1),
-    "ldgettext": Keyword("ldgettext", 2, domain_param=1),
-    "ngettext": Keyword("ngettext", 1, 2),
-    "lngettext": Keyword("ngettext", 1, 2),
-    "ungettext": Keyword("ungettext", 1, 2),
-    "dngettext": Keyword("dngettext", 2, 3, domain_param=1),
-    "ldngettext": Keyword("dngettext", 2, 3, domain_param=1),
-    "pgettext": Keyword("pgettext", 2, msgctxt_param=1),
-}
-
 
 class ParseError(ValueError):
     def __init__(self, msg, lineno):
@@ -124,16 +117,19 @@ class _SafeReadline:
 
 
 class TokenStreamer:
-    def __init__(self, readline):
+    def __init__(self, readline, line_offset=0):
         self.queue = tokenize.generate_tokens(_SafeReadline(readline))
         self.pushed = []
         self.complete = False
+        self.line_offset = line_offset
 
     def __iter__(self):
         return self
 
     def _transform(self, raw_token):
         token_type, token, loc_start, loc_end, line = raw_token
+        if self.line_offset:
+            loc_start = (loc_start[0] + self.line_offset, loc_start[1])
         return token_type, token, loc_start, self
 
     def push(self, token):
@@ -162,22 +158,24 @@ class TokenStreamer:
 class PythonParser:
     last_comment = (-2, None)
 
-    def __call__(self, token_stream, options, filename, firstline):
+    def __init__(self, keywords=KEYWORDS):
+        self.keywords = keywords
+
+    def start(self, options, filename, firstline):
         self.options = options
-        if options.comment_tag is True:
-            self.include_comments = "all"
-        elif options.comment_tag is None:
-            self.include_comments = "none"
-        else:
-            self.include_comments = "tagged"
+        self.last_comment = PythonParser.last_comment
+        self.include_comments = comment_mode_for(options)
+        if self.include_comments == "tagged":
             self.comment_marker = options.comment_tag
         self.filename = filename
         self.firstline = firstline
         self.messages = []
         self.handler = self.state_skip
+
+    def __call__(self, token_stream, options, filename, firstline):
+        self.start(options, filename, firstline)
         try:
-            for token_type, token, location, _ in token_stream:
-                self.process_token(token_type, token, location, token_stream)
+            self.process_tokens(token_stream)
         except tokenize.TokenError as e:
             print(
                 f"Aborting due to parse error in {filename}[{firstline + e.args[1][0]}]: "
@@ -185,13 +183,19 @@ class PythonParser:
                 file=sys.stderr,
             )
             sys.exit(1)
+        return self.messages
+
+    def process_tokens(self, token_stream):
+        try:
+            for token_type, token, location, _ in token_stream:
+                self.process_token(token_type, token, location, token_stream)
         except ParseError as e:
             print(
-                f"Aborting due to parse error in {filename}[{firstline + e.lineno}]: {e.args[0]}",
+                f"Aborting due to parse error in {self.filename}[{self.firstline + e.lineno}]: "
+                f"{e.args[0]}",
                 file=sys.stderr,
             )
             sys.exit(1)
-        return self.messages
 
     def process_token(self, token_type, token, location, token_stream):
         if token_type == tokenize.COMMENT:
@@ -238,9 +242,9 @@ class PythonParser:
 
     def state_skip(self, token_type, token, location, token_stream):
         """Ignore all input until we see one of our keywords."""
-        if token_type == tokenize.NAME and (token in KEYWORDS or token == "_"):
+        if token_type == tokenize.NAME and (token in self.keywords or token == "_"):
             self.handler = self.state_in_keyword
-            self.keyword = KEYWORDS.get(token, None)
+            self.keyword = self.keywords.get(token, None)
             self.lineno = location[0]
         elif token_type == tokenize.NAME and token == "def":
             self.handler = self.state_skip_function_def
@@ -356,7 +360,7 @@ class PythonParser:
 
         comments = []
         flags = []
-        if msg[4]:
+        if msg[4] and self.options.comments:
             comments.append(msg[4])
         if self.last_comment[0] >= (self.lineno - 1):
             comments.append(self.last_comment[1])
@@ -365,8 +369,7 @@ class PythonParser:
                     flags.append(f)
         comment = "\n".join(comments)
 
-        check_c_format(msg[2], flags)
-        check_python_format(msg[2], flags)
+        check_formats(msg[2], flags)
         self.messages.append(
             Message(
                 msg[1],
@@ -380,23 +383,647 @@ class PythonParser:
         )
 
 
-def _extract_python(filename, source, options, firstline=0):
+# Python 3.12 tokenizes the expressions in f-strings, so from then on the
+# token engine finds keyword calls inside them.
+_FSTRING_EXPRESSIONS = sys.version_info >= (3, 12)
+
+# Arguments the token engine skips as one bracketed value.
+_BRACKETED = (ast.Tuple, ast.List, ast.Set, ast.Dict, ast.ListComp, ast.SetComp, ast.DictComp)
+
+
+class _Unsupported(Exception):
+    """The AST engine can not be sure to find what the token engine finds."""
+
+
+def _is_dotted_name(node):
+    while isinstance(node, ast.Attribute):
+        node = node.value
+    return isinstance(node, ast.Name)
+
+
+def _end(node):
+    return (node.end_lineno, node.end_col_offset)
+
+
+def _first_line(node):
+    # The line of a function or class is that of its name, after the decorators.
+    decorators = getattr(node, "decorator_list", None)
+    return decorators[0].lineno if decorators else node.lineno
+
+
+class _AstScanner:
+    """Find keyword calls in a syntax tree, as the token engine sees them.
+
+    Anything where the token engine would behave differently from what the
+    tree suggests, such as parenthesized arguments or operators, raises
+    `_Unsupported` so the caller can use the token engine instead.
+    Positions are ``(line, byte offset)`` pairs, like those of the tree.
+    """
+
+    def __init__(self, source, keywords):
+        self.lines = source.encode("utf-8").split(b"\n")
+        self.keywords = keywords
+        self.names = set(keywords) | {"_"}
+        # (position of the closing parenthesis, line, keyword, arguments)
+        self.calls = []
+        # Ranges the token engine skips without looking at comments.
+        self.skipped = []
+
+    def next_token(self, position):
+        """Return the first character at or after a position that starts a token.
+
+        Returns ``(char, position, same_line)``, where ``same_line`` is False
+        if a newline or a comment was skipped. ``char`` is None at the end
+        of the source.
+        """
+        lineno, col = position
+        same_line = True
+        while lineno <= len(self.lines):
+            line = self.lines[lineno - 1]
+            while col < len(line):
+                char = line[col : col + 1]
+                if char == b"#":
+                    same_line = False
+                    break
+                if char == b"\\":
+                    break  # Line continuation
+                if char not in b" \t\x0c\r":
+                    return char, (lineno, col), same_line
+                col += 1
+            else:
+                same_line = False
+            lineno += 1
+            col = 0
+        return None, None, same_line
+
+    def candidate_lines(self, source):
+        """Return the numbers of the lines that mention a keyword, in order."""
+        pattern = _keyword_pattern(frozenset(self.names))
+        lines = []
+        lineno = 1
+        offset = 0
+        for m in pattern.finditer(source):
+            lineno += source.count("\n", offset, m.start())
+            offset = m.start()
+            if not lines or lines[-1] != lineno:
+                lines.append(lineno)
+        return lines
+
+    def scan(self, tree, source):
+        lines = self.candidate_lines(source)
+        stack = [tree] if lines else []
+        while stack:
+            node = stack.pop()
+            end_lineno = getattr(node, "end_lineno", None)
+            if end_lineno is not None:
+                # Skip the parts of the tree that do not mention a keyword.
+                i = bisect.bisect_left(lines, _first_line(node))
+                if i == len(lines) or lines[i] > end_lineno:
+                    continue
+            if isinstance(node, ast.Call):
+                func = node.func
+                if isinstance(func, ast.Name):
+                    name = func.id
+                elif isinstance(func, ast.Attribute):
+                    name = func.attr
+                else:
+                    name = None
+                if name in self.names:
+                    self.add_call(node, name)
+                    if isinstance(func, ast.Attribute):
+                        stack.append(func.value)
+                    continue
+            elif isinstance(node, ast.Name):
+                if node.id in self.names:
+                    self.check_not_called(node)
+            elif isinstance(node, ast.Attribute):
+                if node.attr in self.names:
+                    self.check_not_called(node)
+            elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                if any((a.asname or a.name.split(".")[-1]) in self.names for a in node.names):
+                    self.check_not_called(node)
+            elif isinstance(node, (ast.Global, ast.Nonlocal)):
+                if any(name in self.names for name in node.names):
+                    self.check_not_called(node)
+            elif isinstance(node, ast.ClassDef):
+                if node.name in self.names:
+                    raise _Unsupported()  # The token engine parses the bases.
+            elif isinstance(node, ast.JoinedStr) and not _FSTRING_EXPRESSIONS:
+                continue
+            stack.extend(ast.iter_child_nodes(node))
+
+    def check_not_called(self, node):
+        # The token engine also treats a keyword followed by a parenthesis on
+        # the next line as a call.
+        if self.next_token(_end(node))[0] == b"(":
+            raise _Unsupported()
+
+    def expect(self, position, char):
+        found, position, _ = self.next_token(position)
+        if found != char:
+            raise _Unsupported()
+        return position
+
+    def expect_end(self, node):
+        # The token engine only sees a name as an argument if it is directly
+        # followed by a comma or a closing parenthesis.
+        char, _, same_line = self.next_token(_end(node))
+        if char not in (b",", b")") or not same_line:
+            raise _Unsupported()
+
+    def add_call(self, node, name):
+        if any(isinstance(arg, ast.Starred) for arg in node.args):
+            raise _Unsupported()
+        items = [(None, arg) for arg in node.args]
+        for keyword in node.keywords:
+            if keyword.arg is None:
+                raise _Unsupported()
+            items.append((keyword.arg, keyword))
+        lineno, col = self.expect(_end(node.func), b"(")
+        position = (lineno, col + 1)
+        arguments = []
+        for index, (arg_name, item) in enumerate(items):
+            if index:
+                lineno, col = self.expect(position, b",")
+                position = (lineno, col + 1)
+            if self.next_token(position)[1] != (item.lineno, item.col_offset):
+                raise _Unsupported()  # Parenthesized argument
+            value = item
+            if arg_name is not None:
+                name_end = (item.lineno, item.col_offset + len(arg_name.encode("utf-8")))
+                char, (lineno, col), same_line = self.next_token(name_end)
+                if char != b"=" or not same_line:
+                    raise _Unsupported()
+                value = item.value
+                if self.next_token((lineno, col + 1))[1] != (value.lineno, value.col_offset):
+                    raise _Unsupported()
+            argument = self.argument(arg_name, value)
+            if not isinstance(argument[1], (str, bytes, list)) and index != len(items) - 1:
+                raise _Unsupported()  # The token engine aborts on a number before a comma.
+            arguments.append(argument)
+            position = _end(item)
+        char, (lineno, col), _ = self.next_token(position)
+        if char == b"," and items:
+            if not isinstance(arguments[-1][1], (str, bytes, list)):
+                raise _Unsupported()
+            char, (lineno, col), _ = self.next_token((lineno, col + 1))
+        if char != b")" or (lineno, col + 1) != _end(node):
+            raise _Unsupported()
+        self.calls.append((_end(node), node.func.end_lineno, self.keywords.get(name), arguments))
+
+    def argument(self, arg_name, node):
+        """Return an argument as the token engine parses it."""
+        if isinstance(node, ast.Constant):
+            value = node.value
+            if isinstance(value, (str, bytes)):
+                return (arg_name, value, node.lineno)
+            if value is None or isinstance(value, bool):
+                self.expect_end(node)
+                return (arg_name, DYNAMIC, node.lineno)
+            if isinstance(value, (int, float, complex)) and arg_name is None:
+                return (arg_name, value, node.lineno)
+        elif isinstance(node, (ast.Name, ast.Attribute)) and _is_dotted_name(node):
+            self.expect_end(node)
+            return (arg_name, DYNAMIC, node.end_lineno)
+        elif isinstance(node, ast.Call) and _is_dotted_name(node.func):
+            char, position, same_line = self.next_token(_end(node.func))
+            if char == b"(" and same_line:
+                self.skipped.append((position, _end(node)))
+                return (arg_name, DYNAMIC, node.func.end_lineno)
+        elif isinstance(node, ast.Subscript) and _is_dotted_name(node.value):
+            position = self.expect(_end(node.value), b"[")
+            self.skipped.append((position, _end(node)))
+            return (arg_name, DYNAMIC, position[0])
+        elif isinstance(node, _BRACKETED):
+            self.skipped.append(((node.lineno, node.col_offset), _end(node)))
+            return (arg_name, DYNAMIC, node.lineno)
+        raise _Unsupported()
+
+    def comments(self, tree, source):
+        """Return the comments the token engine processes, as ``(position, text)`` pairs.
+
+        Only comments that can end up in a message are returned: those on the
+        lines of keyword calls, and the comment blocks right above them.
+        """
+        comments = self.comments_near_calls(tree)
+        if comments is None:
+            comments = self.tokenized_comments(source)
+        skipped = sorted(self.skipped)
+        starts = [start for (start, _) in skipped]
+        for position, comment in comments:
+            i = bisect.bisect_right(starts, position) - 1
+            if i < 0 or position >= skipped[i][1]:
+                yield position, comment
+
+    def comments_near_calls(self, tree):
+        # Returns None if a "#" may be a comment inside a string spread over
+        # several lines, which only the tokenizer can tell.
+        with_hash = {i for (i, line) in enumerate(self.lines, 1) if b"#" in line}
+        lines = set()
+        for (end_lineno, _), lineno, _, _ in self.calls:
+            lines.update(i for i in range(lineno, end_lineno + 1) if i in with_hash)
+            lineno -= 1
+            while lineno in with_hash:
+                lines.add(lineno)
+                lineno -= 1
+        lines = sorted(lines)
+        strings = {}
+        stack = [tree] if lines else []
+        while stack:
+            node = stack.pop()
+            end_lineno = getattr(node, "end_lineno", None)
+            if end_lineno is not None:
+                i = bisect.bisect_left(lines, _first_line(node))
+                if i == len(lines) or lines[i] > end_lineno:
+                    continue
+                if isinstance(node, ast.JoinedStr) or (
+                    isinstance(node, ast.Constant) and isinstance(node.value, (str, bytes))
+                ):
+                    while i < len(lines) and lines[i] <= end_lineno:
+                        strings.setdefault(lines[i], []).append(node)
+                        i += 1
+                    continue
+            stack.extend(ast.iter_child_nodes(node))
+        comments = []
+        for lineno in lines:
+            line = self.lines[lineno - 1]
+            col = line.find(b"#")
+            while col != -1:
+                position = (lineno, col)
+                string = next(
+                    (
+                        node
+                        for node in strings.get(lineno, [])
+                        if (node.lineno, node.col_offset) <= position < _end(node)
+                    ),
+                    None,
+                )
+                if string is None:
+                    comments.append((position, line[col:].decode("utf-8")))
+                    break
+                if string.lineno != string.end_lineno:
+                    return None
+                col = line.find(b"#", col + 1)
+        return comments
+
+    def tokenized_comments(self, source):
+        comments = []
+        for token in tokenize.generate_tokens(io.StringIO(source).readline):
+            if token.type == tokenize.COMMENT:
+                lineno, col = token.start
+                # Token positions count characters, tree positions count bytes.
+                comments.append(((lineno, len(token.line[:col].encode("utf-8"))), token.string))
+        return comments
+
+
+def _extract_ast(parser, source, options, filename, firstline):
+    """Extract messages using the syntax tree of a source.
+
+    Returns None if the token engine has to be used instead.
+    """
+    try:
+        with warnings.catch_warnings():
+            # Invalid escape sequences are the concern of the code's owner.
+            warnings.simplefilter("ignore")
+            tree = ast.parse(source, filename)
+        scanner = _AstScanner(source, parser.keywords)
+        scanner.scan(tree, source)
+        parser.start(options, filename, firstline)
+        events = [(position, None, call) for (position, *call) in scanner.calls]
+        if parser.include_comments != "none":
+            events += [
+                (position, comment, None) for (position, comment) in scanner.comments(tree, source)
+            ]
+    except (SyntaxError, ValueError, RecursionError, tokenize.TokenError, _Unsupported):
+        return None
+    events.sort(key=lambda event: event[0])
+    for position, comment, call in events:
+        if call is None:
+            parser.process_comment(comment, position)
+        else:
+            parser.lineno, parser.keyword, parser.arguments = call
+            parser.process_keyword()
+    return parser.messages
+
+
+# Sources smaller than this are always tokenized completely.
+WINDOWED_MIN_SIZE = 64 * 1024
+
+# Strings and comments, which can hide brackets, quotes and keywords.
+_STRINGS_AND_COMMENTS = re.compile(
+    r"#[^\n]*"
+    r"|'''[^\\']*(?:(?:\\.|'(?!''))[^\\']*)*'''"
+    r'|"""[^\\"]*(?:(?:\\.|"(?!""))[^\\"]*)*"""'
+    r"|'[^\\'\n]*(?:\\.[^\\'\n]*)*'"
+    r'|"[^\\"\n]*(?:\\.[^\\"\n]*)*"',
+    re.DOTALL,
+)
+
+# What the tokenizer skips between a name and the next token.
+_TOKEN_GAP = re.compile(r"(?:[ \t\f\r\n\x03]|\\\r?\n)*")
+
+
+@functools.lru_cache(maxsize=16)
+def _keyword_pattern(names):
+    names = "|".join(map(re.escape, sorted(names)))
+    return re.compile(rf"\b(?:{names})\b")
+
+
+class _Ambiguous(Exception):
+    """A text scan can not tell where the logical lines of a source are."""
+
+
+def _mask(match):
+    # Keep the line breaks so line numbers stay the same. Comments become
+    # \x03, strings \x02 followed by \x01 on each of their further lines.
+    text = match.group()
+    if text[0] == "#":
+        return "\x03"
+    if _FSTRING_EXPRESSIONS and "{" in text:
+        prefix = match.string[max(match.start() - 2, 0) : match.start()]
+        if "f" in prefix.lower():
+            raise _Ambiguous()  # The tokenizer looks into the f-string.
+    return "\x02" + "\n\x01" * text.count("\n")
+
+
+def _logical_lines(source):
+    """Scan a source for the lines where logical lines start.
+
+    Returns the source with strings and comments masked, its lines, and the
+    numbers of the lines that start a logical line, in order. Raises
+    `_Ambiguous` if the source does not tokenize cleanly.
+    """
+    masked = _STRINGS_AND_COMMENTS.sub(_mask, source)
+    if "'" in masked or '"' in masked:
+        raise _Ambiguous()  # An unterminated string
+    lines = masked.split("\n")
+    starts = []
+    depth = 0
+    continued = False
+    for lineno, line in enumerate(lines, 1):
+        if not depth and not continued and line[:1] != "\x01":
+            starts.append(lineno)
+        depth += line.count("(") + line.count("[") + line.count("{")
+        depth -= line.count(")") + line.count("]") + line.count("}")
+        if depth < 0:
+            raise _Ambiguous()
+        continued = line.endswith("\\") or line.endswith("\\\r")
+    if depth or continued:
+        raise _Ambiguous()
+    return masked, lines, starts
+
+
+def _keyword_gaps(masked, names):
+    """Yield the line of each keyword and the line of the token after it."""
+    lineno = 1
+    offset = 0
+    for match in _keyword_pattern(names).finditer(masked):
+        lineno += masked.count("\n", offset, match.start())
+        offset = match.start()
+        # The keyword state carries over to the next token, wherever it is.
+        gap = _TOKEN_GAP.match(masked, match.end()).group()
+        yield lineno, lineno + gap.count("\n")
+
+
+def _token_windows(source, names, include_comments):
+    """Return the line ranges the token engine has to see to find all keywords.
+
+    The ranges are ``(first, end)`` pairs of line numbers, with ``end``
+    excluded, that start and end at logical lines. They cover the logical
+    lines with a keyword, the token after each keyword, and, if
+    ``include_comments`` is set, the comments right above them.
+    Raises `_Ambiguous` if the source does not tokenize cleanly.
+    """
+    masked, lines, starts = _logical_lines(source)
+    windows = []
+    for lineno, last in _keyword_gaps(masked, names):
+        first = starts[bisect.bisect_right(starts, lineno) - 1]
+        while include_comments and first > 1 and "\x03" in lines[first - 2]:
+            first = starts[bisect.bisect_right(starts, first - 1) - 1]
+        i = bisect.bisect_right(starts, last)
+        windows.append((first, starts[i] if i < len(starts) else len(lines) + 1))
+    merged = []
+    for first, end in sorted(windows):
+        if merged and first <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+        else:
+            merged.append((first, end))
+    return merged
+
+
+def _starts_top_level(lines, index):
+    # Check that the first line of code from index on is not indented.
+    for i in range(index, len(lines)):
+        line = lines[i]
+        if line.strip() not in ("", "\x03"):
+            return line[:1] not in (" ", "\t", "\x0c")
+    return True
+
+
+def _statement_parts(source, names):
+    """Split a source at top-level statements that the token engine sees apart.
+
+    Returns ``(first, end)`` line ranges that cover the source. A part
+    starts at a top-level statement, or at the comments right above one. It
+    never starts right below a comment, which could belong to a message in
+    the part, or between a keyword and the token after it. Raises
+    `_Ambiguous` if the source does not tokenize cleanly.
+    """
+    masked, lines, starts = _logical_lines(source)
+    blocked = set()
+    for lineno, last in _keyword_gaps(masked, names):
+        blocked.update(range(lineno + 1, last + 1))
+    parts = []
+    first = 1
+    for lineno in starts[1:]:
+        line = lines[lineno - 1]
+        if (
+            line[:1] in ("", " ", "\t", "\x0c", "\r")
+            or "\x03" in lines[lineno - 2]
+            or lineno in blocked
+        ):
+            continue
+        if line[:1] == "\x03" and not _starts_top_level(lines, lineno):
+            continue
+        parts.append((first, lineno))
+        first = lineno
+    parts.append((first, len(lines) + 1))
+    return parts
+
+
+def _extract_windows(parser, source, options, filename, firstline):
+    """Extract messages by tokenizing only the logical lines around keywords.
+
+    Returns None if the whole source has to be tokenized instead.
+    """
+    parser.start(options, filename, firstline)
+    names = frozenset(parser.keywords) | {"_"}
+    try:
+        windows = _token_windows(source, names, parser.include_comments != "none")
+    except _Ambiguous:
+        return None
+    lines = source.split("\n")
+    if sum(end - first for (first, end) in windows) * 2 > len(lines):
+        return None  # Not worth the extra work
+    for first, end in windows:
+        # Parentheses around the window free it from its indentation.
+        text = "(" + "\n".join(lines[first - 1 : end - 1]) + "\n)"
+        try:
+            parser.process_tokens(TokenStreamer(io.StringIO(text).readline, first - 1))
+        except (tokenize.TokenError, SyntaxError):
+            return None
+    return parser.messages
+
+
+# Sources smaller than this are never split between processes.
+PARALLEL_MIN_SIZE = 1024 * 1024
+
+
+def _extract_chunk(chunk):
+    """Extract the messages from a part of a source in a worker process.
+
+    Returns the messages, or None if the extractor gave up, and what it
+    wrote to stderr.
+    """
+    filename, text, firstline, options, keywords, engine = chunk
+    stderr = io.StringIO()
+    with contextlib.redirect_stderr(stderr):
+        try:
+            messages = PythonExtractor({"engine": engine})._extract(
+                filename, options, io.StringIO(text), firstline, keywords
+            )
+        except SystemExit:
+            messages = None
+    return messages, stderr.getvalue()
+
+
+def _extract_parallel(source, options, filename, firstline, keywords, engine, jobs):
+    """Extract messages from parts of a source in ``jobs`` processes.
+
+    The source is split at top-level statements into a few chunks per
+    process. Returns None if the source can not be split, or if extracting
+    a chunk failed, so the caller can extract the whole source and report
+    the problem.
+    """
+    try:
+        parts = _statement_parts(source, frozenset(keywords) | {"_"})
+    except _Ambiguous:
+        return None
+    lines = source.split("\n")
+    target = len(lines) // (jobs * 4) + 1
+    chunks = []
+    first = 1
+    for _, end in parts:
+        if end - first >= target or end > len(lines):
+            text = "\n".join(lines[first - 1 : end - 1]) + ("\n" if end <= len(lines) else "")
+            chunks.append((filename, text, firstline + first - 1, options, keywords, engine))
+            first = end
+    if len(chunks) < 2:
+        return None
+    try:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=jobs)
+    except (OSError, RuntimeError):
+        return None
+    try:
+        futures = [executor.submit(_extract_chunk, chunk) for chunk in chunks]
+        results = [future.result() for future in futures]
+    except (OSError, RuntimeError):  # Including a broken pool
+        executor.shutdown(wait=False, cancel_futures=True)
+        return None
+    except BaseException:
+        # Do not wait for the workers, so a time budget can abort the file.
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+    if any(messages is None for (messages, _) in results):
+        return None
+    messages = []
+    for chunk_messages, stderr in results:
+        sys.stderr.write(stderr)
+        messages.extend(chunk_messages)
+    return messages
+
+
+def _in_parallel_run(options):
+    # Workers of a run that extracts several files at once must not start
+    # pools of their own: threads would fork and processes would nest pools.
+    return isinstance(options, ExtractionSession) and options.parallel
+
+
+def _extract_python(filename, source, options, firstline=0, keywords=None):
     if isinstance(source, bytes):
         source = source.decode("utf-8")
     fileobj = io.StringIO(source)
-    extractor = PythonExtractor()
-    return extractor(filename, options, fileobj, firstline)
+    if keywords is None:
+        keywords = keywords_for(options)
+    return PythonExtractor()._extract(filename, options, fileobj, firstline, keywords)
 
 
 class PythonExtractor(Extractor):
     """Python sources"""
 
     extensions = [".py"]
+    source_mode = "r"
+    default_config = {
+        # "token" follows the token stream, "ast" walks the syntax tree and
+        # falls back to the token stream for code it can not handle.
+        "engine": "token",
+        # Number of processes to split large sources between.
+        "jobs": 1,
+    }
 
     def __call__(self, filename, options, fileobj=None, lineno=0):
-        update_keywords(KEYWORDS, options.keywords)
+        return self._extract(filename, options, fileobj, lineno, keywords_for(options))
+
+    def extract_many(self, files, options):
+        # Parse the keyword specs once for all files.
+        keywords = keywords_for(options)
+        for filename, fileobj in files:
+            yield self._extract(filename, options, fileobj, 0, keywords)
+
+    def split_source(self, source, options):
+        try:
+            return _statement_parts(source, frozenset(keywords_for(options)) | {"_"})
+        except _Ambiguous:
+            return None
+
+    def _extract(self, filename, options, fileobj, lineno, keywords):
         if fileobj is None:
-            fileobj = _open(filename)
-        token_stream = TokenStreamer(fileobj.readline)
-        parser = PythonParser()
-        return parser(token_stream, options, filename, lineno)
+            with _open(filename) as fileobj:
+                return self._parse(filename, options, fileobj, lineno, keywords)
+        return self._parse(filename, options, fileobj, lineno, keywords)
+
+    def _parse(self, filename, options, fileobj, lineno, keywords):
+        parser = PythonParser(keywords)
+        engine = self.config["engine"]
+        if engine not in ("token", "ast"):
+            print(f"Unknown engine for the Python extractor: {engine}", file=sys.stderr)
+            sys.exit(1)
+        try:
+            jobs = int(self.config["jobs"])
+        except ValueError:
+            print(
+                f"Invalid number of jobs for the Python extractor: {self.config['jobs']}",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+        source = fileobj.read()
+        if isinstance(source, str):
+            if jobs > 1 and len(source) >= PARALLEL_MIN_SIZE and not _in_parallel_run(options):
+                messages = _extract_parallel(
+                    source, options, filename, lineno, keywords, engine, jobs
+                )
+                if messages is not None:
+                    return messages
+            if engine == "ast":
+                messages = _extract_ast(parser, source, options, filename, lineno)
+                if messages is not None:
+                    return messages
+            if len(source) >= WINDOWED_MIN_SIZE:
+                messages = _extract_windows(parser, source, options, filename, lineno)
+                if messages is not None:
+                    return messages
+            fileobj = io.StringIO(source)
+        else:
+            fileobj = io.BytesIO(source)
+        return parser(TokenStreamer(fileobj.readline), options, filename, lineno)
@@ -11,7 +11,7 @@ from chameleon.tales import split_parts
 from chameleon.utils import decode_htmlentities
 from chameleon.zpt.program import MacroProgram
 
-from . import Extractor, Message
+from . import Extractor, Message, keywords_for
 from .python import _extract_python
 
 
@@ -67,20 +67,21 @@ class TranslateContext:
         text = WHITESPACE.sub(" ", text)
         return text
 
-    def message(self):
+    def message(self, include_comments=True):
         text = self.full_text()
         if not self.msgid:
             self.msgid = text
             text = ""
         comments = []
-        if self.comment:
-            comments.append(self.comment)
-        if text:
-            comments.append(f"Default: {text}")
-        for name, context in self.children.items():
-            comments.append(f'Canonical text for ${{{name}}} is: "{context.full_text()}"')
-        if self.parent:
-            comments.append(f'Used in sentence: "{self.parent.full_text()}"')
+        if include_comments:
+            if self.comment:
+                comments.append(self.comment)
+            if text:
+                comments.append(f"Default: {text}")
+            for name, context in self.children.items():
+                comments.append(f'Canonical text for ${{{name}}} is: "{context.full_text()}"')
+            if self.parent:
+                comments.append(f'Used in sentence: "{self.parent.full_text()}"')
         return Message(
             self.msgctxt,
             self.msgid,
@@ -97,7 +98,9 @@ def get_newline_count(s):
     return len(s.split("\n")) - 1
 
 
-def get_plain_attrs(attrs):
+def get_plain_attrs(attrs, count_lines=True):
+    if not count_lines:
+        return {attr["name"].split(":")[-1]: (attr["value"], 0, 0) for attr in attrs}
     plain_attrs = {}
     offset = 0
     for attr in attrs:
@@ -112,23 +115,42 @@ class ChameleonExtractor(Extractor, ElementProgram):
     """Chameleon templates (defaults to Python expressions)"""
 
     extensions = [".pt"]
+    source_mode = "rb"
     DEFAULT_NAMESPACES = MacroProgram.DEFAULT_NAMESPACES
     default_config = {
         "default-engine": "python",
     }
 
     def __call__(self, filename, options, fileobj=None, lineno=0):
+        return type(self)(self.config)._extract(
+            filename, options, fileobj, lineno, keywords_for(options)
+        )
+
+    def extract_many(self, files, options):
+        # One instance for the parse state and one keyword table for all files.
+        extractor = type(self)(self.config)
+        keywords = keywords_for(options)
+        for filename, fileobj in files:
+            yield extractor._extract(filename, options, fileobj, 0, keywords)
+
+    def _extract(self, filename, options, fileobj, lineno, keywords):
         self.options = options
+        self.keywords = keywords
         self.filename = filename
         self.target_domain = options.domain
+        self.count_lines = options.linenumbers
+        self.include_comments = options.comments
         self.messages = []
         self.domainstack = collections.deque([(None, None, None)])
         self.translatestack = collections.deque([None])
         self.linenumber = 1
         if fileobj is None:
-            fileobj = _open(filename)
+            with _open(filename) as fileobj:
+                source = fileobj.read()
+        else:
+            source = fileobj.read()
         try:
-            source = fileobj.read().decode("utf-8")
+            source = source.decode("utf-8")
             ElementProgram.__init__(self, source, filename=filename)
         except UnicodeDecodeError as e:
             print(f"Aborting due to parse error in {self.filename}: {e}", file=sys.stderr)
@@ -136,7 +158,10 @@ class ChameleonExtractor(Extractor, ElementProgram):
         except KeyError as e:  # Chameleon attribute error
             print(f"Aborting due to parse error in {self.filename}: {e.message}", file=sys.stderr)
             sys.exit(1)
-        return [m.message() if isinstance(m, TranslateContext) else m for m in self.messages]
+        return [
+            m.message(self.include_comments) if isinstance(m, TranslateContext) else m
+            for m in self.messages
+        ]
 
     def visit(self, kind, args):
         visitor = getattr(self, f"visit_{kind}", None)
@@ -153,17 +178,19 @@ class ChameleonExtractor(Extractor, ElementProgram):
         self.visit_element(element, None, [])
 
     def visit_element(self, start, end, children):
-        self.linenumber += get_newline_count(start["prefix"] + start["name"])
+        if self.count_lines:
+            self.linenumber += get_newline_count(start["prefix"] + start["name"])
         if self.translatestack and self.translatestack[-1]:
             self.translatestack[-1].add_element(start)
 
         attributes = start["ns_attrs"]
-        plain_attrs = get_plain_attrs(start["attrs"])
+        plain_attrs = get_plain_attrs(start["attrs"], self.count_lines)
         childs_lineno = self.linenumber
-        post_offset = [x[2] for x in plain_attrs.values()]
-        if post_offset:
-            childs_lineno += max(post_offset)
-        childs_lineno += get_newline_count(start["suffix"])
+        if self.count_lines:
+            post_offset = [x[2] for x in plain_attrs.values()]
+            if post_offset:
+                childs_lineno += max(post_offset)
+            childs_lineno += get_newline_count(start["suffix"])
         new_domain = attributes.get((I18N_NS, "domain"))
         old_domain = self.domainstack[-1][0] if self.domainstack else None
         new_context = attributes.get((I18N_NS, "context"))
@@ -214,7 +241,7 @@ class ChameleonExtractor(Extractor, ElementProgram):
                         self.add_message(
                             self.domainstack[-1][1],
                             value,
-                            self.domainstack[-1][2] or "",
+                            (self.domainstack[-1][2] or "") if self.include_comments else "",
                             offset=offset,
                         )
                     else:
@@ -226,7 +253,10 @@ class ChameleonExtractor(Extractor, ElementProgram):
                             continue
                         value, offset, post_offset = plain_attrs[attr]
                         self.add_message(
-                            self.domainstack[-1][1], msgid, f"Default: {value}", offset=offset
+                            self.domainstack[-1][1],
+                            msgid,
+                            f"Default: {value}" if self.include_comments else "",
+                            offset=offset,
                         )
 
             for attribute, value in attributes.items():
@@ -238,7 +268,7 @@ class ChameleonExtractor(Extractor, ElementProgram):
         for child in children:
             self.visit(*child)
 
-        if end is not None:
+        if end is not None and self.count_lines:
             self.linenumber += get_newline_count(end["prefix"] + end["name"])
             post_offset = [x[2] for x in get_plain_attrs(end["attrs"]).values()]
             if post_offset:
@@ -269,16 +299,20 @@ class ChameleonExtractor(Extractor, ElementProgram):
                     sys.exit(1)
             if self.translatestack[-1]:
                 self.translatestack[-1].add_text(data)
-        self.linenumber += get_newline_count(data)
+        if self.count_lines:
+            self.linenumber += get_newline_count(data)
 
     def visit_comment(self, data):
-        self.linenumber += get_newline_count(data)
+        if self.count_lines:
+            self.linenumber += get_newline_count(data)
 
     def visit_cdata(self, data):
-        self.linenumber += get_newline_count(data)
+        if self.count_lines:
+            self.linenumber += get_newline_count(data)
 
     def visit_processing_instruction(self, data):
-        self.linenumber += get_newline_count(data["text"])
+        if self.count_lines:
+            self.linenumber += get_newline_count(data["text"])
 
     def visit_default(self, data):
         if not data.lower().startswith("<!doctype"):
@@ -287,7 +321,8 @@ class ChameleonExtractor(Extractor, ElementProgram):
                 "Warning: Node type 'default', possible bad markup",
                 file=sys.stderr,
             )
-        self.linenumber += get_newline_count(data)
+        if self.count_lines:
+            self.linenumber += get_newline_count(data)
 
     def add_message(self, msgctxt, msgid, comment="", offset=0):
         self.messages.append(
@@ -358,7 +393,9 @@ class ChameleonExtractor(Extractor, ElementProgram):
 
     def parse_python(self, source):
         assert isinstance(source, str)
-        for message in _extract_python(self.filename, source, self.options, self.linenumber):
+        for message in _extract_python(
+            self.filename, source, self.options, self.linenumber, self.keywords
+        ):
             self.messages.append(
                 Message(
                     *message[:6],
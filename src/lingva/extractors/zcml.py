@@ -15,8 +15,12 @@ class ZCMLExtractor(Extractor):
 
     extensions = [".zcml"]
     ATTRIBUTES = set(["title", "description"])
+    source_mode = "rb"
 
     def __call__(self, filename, options, fileobj=None, lineno=0):
+        return type(self)(self.config)._extract(filename, options, fileobj, lineno)
+
+    def _extract(self, filename, options, fileobj, lineno):
         self.filename = filename
         self.target_domain = options.domain
         self.messages = []
@@ -24,10 +28,12 @@ class ZCMLExtractor(Extractor):
         self.parser.StartElementHandler = self.StartElementHandler
         self.parser.EndElementHandler = self.EndElementHandler
         self.domainstack = collections.deque()
-        if fileobj is None:
-            fileobj = _open(filename)
         try:
-            self.parser.ParseFile(fileobj)
+            if fileobj is None:
+                with _open(filename) as fileobj:
+                    self.parser.ParseFile(fileobj)
+            else:
+                self.parser.ParseFile(fileobj)
         except expat.ExpatError as e:
             print(f"Aborting due to parse error in {filename}: {e}", file=sys.stderr)
             sys.exit(1)
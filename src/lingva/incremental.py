@@ -0,0 +1,139 @@
+import collections
+import io
+
+from lingva.aio import ExtractionError
+from lingva.extract import load_extractors
+from lingva.extractors import ExtractionSession, get_extractor
+
+
+class BufferExtraction:
+    """The messages of a buffer, as returned by `extract_buffer`.
+
+    ``messages`` are all messages in the buffer; ``added`` and ``removed``
+    are the messages that appeared and disappeared since the previous
+    extraction. Messages that moved to another line are in both.
+    """
+
+    def __init__(self, filename, extractor, options, messages, added, removed, parts):
+        self.filename = filename
+        self.extractor = extractor
+        self.options = options
+        self.messages = messages
+        self.added = added
+        self.removed = removed
+        # Messages of every part of the buffer by its text, with line
+        # numbers counted from the start of the part.
+        self._parts = parts
+
+
+def _message_key(message):
+    return (
+        message.msgctxt,
+        message.msgid,
+        message.msgid_plural,
+        tuple(message.flags),
+        message.comment,
+        message.tcomment,
+        message.location,
+    )
+
+
+def _subtract(messages, other):
+    """Return the messages that are not in other, counting duplicates."""
+    counts = collections.Counter(map(_message_key, other))
+    missing = []
+    for message in messages:
+        key = _message_key(message)
+        if counts[key]:
+            counts[key] -= 1
+        else:
+            missing.append(message)
+    return missing
+
+
+def _move(messages, offset):
+    if not offset:
+        return messages
+    return [
+        message._replace(location=(message.location[0], message.location[1] + offset))
+        if isinstance(message.location[1], int)
+        else message
+        for message in messages
+    ]
+
+
+def _split(extractor, buffer, options):
+    ranges = extractor.split_source(buffer, options)
+    if ranges is None:
+        return [(1, buffer)]
+    lines = buffer.split("\n")
+    return [
+        (first, "\n".join(lines[first - 1 : end - 1]) + ("\n" if end <= len(lines) else ""))
+        for (first, end) in ranges
+    ]
+
+
+def _extract_text(extractor, filename, options, text):
+    if extractor.source_mode == "r":
+        fileobj = io.StringIO(text)
+    else:
+        fileobj = io.BytesIO(text.encode("utf-8"))
+    try:
+        return list(extractor(filename, options, fileobj))
+    except SystemExit as e:  # lingva reports errors and exits
+        raise ExtractionError(f"Can not extract messages from {filename}") from e
+
+
+def extract_buffer(filename, buffer, previous=None, options=None, cfg_file=None):
+    """Extract the messages from the current text of a file, such as an editor buffer.
+
+    The extractor is chosen by ``filename``, using the configuration in
+    ``cfg_file``. ``previous`` is the result of the last call for the same
+    file. The extractor and options of that call are used again, and parts of
+    the buffer that did not change are not extracted again if the extractor
+    can split sources. ``options`` defaults to those of ``previous``, or to
+    all comments and the default keywords.
+
+    Returns a `BufferExtraction`. Raises :class:`ExtractionError` if the
+    buffer can not be parsed; ``previous`` can still be used for the next
+    call.
+    """
+    if previous is not None and previous.filename != filename:
+        previous = None
+    if previous is None:
+        try:
+            extractors, extensions = load_extractors(cfg_file)
+        except SystemExit as e:
+            raise ExtractionError("Invalid configuration") from e
+        extractor = get_extractor(filename, extractors, extensions)
+        if extractor is None:
+            raise ExtractionError(f"No extractor available for file {filename}")
+        cache = {}
+        old_messages = []
+    else:
+        extractor = previous.extractor
+        cache = previous._parts if options in (None, previous.options) else {}
+        old_messages = previous.messages
+        if options is None:
+            options = previous.options
+    if options is None:
+        options = ExtractionSession(comment_tag=True, domain=None, keywords=[])
+    parts = {}
+    messages = []
+    for first, text in _split(extractor, buffer, options):
+        found = parts.get(text)
+        if found is None:
+            found = cache.get(text)
+        if found is None:
+            found = _extract_text(extractor, filename, options, text)
+        parts[text] = found
+        messages.extend(_move(found, first - 1))
+    return BufferExtraction(
+        filename,
+        extractor,
+        options,
+        messages,
+        _subtract(messages, old_messages),
+        _subtract(old_messages, messages),
+        parts,
+    )
@@ -0,0 +1,174 @@
+import os
+import sqlite3
+import sys
+
+import click
+
+INDEX_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    msgctxt TEXT,
+    msgid TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_msgid ON messages (msgid, msgctxt);
+CREATE TABLE IF NOT EXISTS occurrences (
+    message_id INTEGER NOT NULL REFERENCES messages (id),
+    filename TEXT NOT NULL,
+    line INTEGER,
+    extractor TEXT,
+    domain TEXT
+);
+CREATE INDEX IF NOT EXISTS occurrences_message ON occurrences (message_id);
+CREATE INDEX IF NOT EXISTS occurrences_filename ON occurrences (filename);
+"""
+
+
+class MessageIndex:
+    """Where messages are used, stored in an SQLite database.
+
+    The messages of a file replace everything recorded for that file before,
+    so an index can be updated with only the files that were extracted.
+    Filenames are stored relative to the directory extraction runs in and
+    normalized with ``os.path.normpath``, so ``./src/a.py`` in the catalog is
+    ``src/a.py`` in the index; `messages` normalizes the name it is given the
+    same way. Changes are committed by `close`.
+    """
+
+    def __init__(self, path, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        try:
+            if readonly:
+                self.connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            else:
+                self.connection = sqlite3.connect(path)
+            version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        except sqlite3.DatabaseError as e:
+            raise ValueError(f"{path} is not a lingva index: {e}")
+        if version != INDEX_VERSION and (readonly or version != 0):
+            self.connection.close()
+            raise ValueError(f"{path} is not a lingva index")
+        if not readonly:
+            self.connection.executescript(SCHEMA)
+            self.connection.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+        self._message_ids = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.connection.rollback()
+            self.connection.close()
+
+    def _message_id(self, msgctxt, msgid):
+        key = (msgctxt, msgid)
+        message_id = self._message_ids.get(key)
+        if message_id is None:
+            row = self.connection.execute(
+                "SELECT id FROM messages WHERE msgid = ? AND msgctxt IS ?", (msgid, msgctxt)
+            ).fetchone()
+            if row is None:
+                message_id = self.connection.execute(
+                    "INSERT INTO messages (msgctxt, msgid) VALUES (?, ?)", (msgctxt, msgid)
+                ).lastrowid
+            else:
+                message_id = row[0]
+            self._message_ids[key] = message_id
+        return message_id
+
+    def update_file(self, filename, messages, extractor=None, domain=None):
+        """Replace the recorded messages of a file."""
+        filename = os.path.normpath(filename)
+        self.connection.execute("DELETE FROM occurrences WHERE filename = ?", (filename,))
+        self.connection.executemany(
+            "INSERT INTO occurrences (message_id, filename, line, extractor, domain)"
+            " VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    self._message_id(message.msgctxt, message.msgid),
+                    filename,
+                    message.location[1],
+                    extractor,
+                    domain,
+                )
+                for message in messages
+            ],
+        )
+
+    def prune(self):
+        """Forget files that no longer exist and messages that are not used."""
+        filenames = [
+            filename
+            for (filename,) in self.connection.execute("SELECT DISTINCT filename FROM occurrences")
+            if not os.path.exists(filename)
+        ]
+        self.connection.executemany(
+            "DELETE FROM occurrences WHERE filename = ?", [(filename,) for filename in filenames]
+        )
+        self.connection.execute(
+            "DELETE FROM messages WHERE id NOT IN (SELECT message_id FROM occurrences)"
+        )
+        self._message_ids = {}
+
+    def close(self):
+        if not self.readonly:
+            self.prune()
+            self.connection.commit()
+        self.connection.close()
+
+    def occurrences(self, msgid, msgctxt=None):
+        """Return the ``(filename, line)`` pairs where a message is used."""
+        return self.connection.execute(
+            "SELECT filename, line FROM occurrences"
+            " JOIN messages ON messages.id = occurrences.message_id"
+            " WHERE msgid = ? AND msgctxt IS ? ORDER BY filename, line",
+            (msgid, msgctxt),
+        ).fetchall()
+
+    def messages(self, filename):
+        """Return the ``(msgctxt, msgid)`` pairs used in a file."""
+        return self.connection.execute(
+            "SELECT DISTINCT msgctxt, msgid FROM messages"
+            " JOIN occurrences ON messages.id = occurrences.message_id"
+            " WHERE filename = ? ORDER BY msgid, msgctxt",
+            (os.path.normpath(filename),),
+        ).fetchall()
+
+
+@click.command()
+@click.argument("index", type=click.Path(exists=True, dir_okay=False))
+@click.argument("msgid", required=False)
+@click.option("--context", "msgctxt", metavar="CONTEXT", help="Context of the message")
+@click.option("--file", "filename", metavar="FILE", help="List the messages used in FILE instead")
+def main(index, msgid, msgctxt, filename):
+    """Show where a message is used, or which messages a file uses.
+
+    INDEX is a file written by pot-create --index.
+    """
+    if (msgid is None) == (filename is None):
+        raise click.UsageError("Give either a MSGID or --file")
+    try:
+        message_index = MessageIndex(index, readonly=True)
+    except ValueError as e:
+        click.echo(e, err=True)
+        sys.exit(1)
+    with message_index:
+        if filename is not None:
+            rows = [
+                f"[{context}] {text}" if context is not None else text
+                for (context, text) in message_index.messages(filename)
+            ]
+        else:
+            rows = [
+                f"{name}:{line}" if line else name
+                for (name, line) in message_index.occurrences(msgid, msgctxt)
+            ]
+    if not rows:
+        sys.exit(1)
+    for row in rows:
+        click.echo(row)
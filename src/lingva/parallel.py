@@ -0,0 +1,218 @@
+import collections
+import concurrent.futures
+import functools
+
+from lingva.extractors import Message, get_extractor, register_extractors
+from lingva.extractors.babel import register_babel_plugins
+from lingva.watchdog import extract_files_within
+
+BACKENDS = ["thread", "process", "interpreter"]
+
+# Registry and options of a process or interpreter worker, set by init_worker.
+_worker_state = None
+
+
+def backend_available(backend):
+    """Check if a backend can be used with this Python version."""
+    if backend == "interpreter":
+        return hasattr(concurrent.futures, "InterpreterPoolExecutor")
+    return backend in BACKENDS
+
+
+def create_executor(backend, jobs, initializer=None, initargs=()):
+    if backend == "thread":
+        return concurrent.futures.ThreadPoolExecutor(
+            max_workers=jobs,
+            thread_name_prefix="lingva",
+            initializer=initializer,
+            initargs=initargs,
+        )
+    if backend == "process":
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs, initializer=initializer, initargs=initargs
+        )
+    if backend == "interpreter" and backend_available(backend):
+        return concurrent.futures.InterpreterPoolExecutor(
+            max_workers=jobs, initializer=initializer, initargs=initargs
+        )
+    raise ValueError(f"Unsupported backend: {backend}")
+
+
+def call_batch(func, batch):
+    return [func(item) for item in batch]
+
+
+def plan_batches(costs, jobs):
+    """Group item indices into batches, most expensive first.
+
+    Items that cost at least a target amount get a batch of their own,
+    cheaper items are grouped until the batch reaches the target. The target
+    is chosen so there are about sixteen batches per worker.
+    """
+    order = sorted(range(len(costs)), key=lambda i: -costs[i])
+    target = sum(costs) / (jobs * 16)
+    batches = []
+    batch = []
+    batch_cost = 0
+    for i in order:
+        batch.append(i)
+        batch_cost += costs[i]
+        if batch_cost >= target:
+            batches.append(batch)
+            batch = []
+            batch_cost = 0
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def imap_ordered(
+    func,
+    items,
+    jobs,
+    window=None,
+    backend="thread",
+    initializer=None,
+    initargs=(),
+    cost=None,
+    batch_func=None,
+):
+    """Call ``func`` for every item in a pool of ``jobs`` workers.
+
+    Yields ``(item, result)`` pairs in the order of ``items``. Exceptions
+    raised by ``func``, including ``SystemExit``, are re-raised in the
+    consumer; calls that have not started yet are cancelled.
+
+    Without ``cost`` items are submitted in order, at most ``window`` (by
+    default four per worker) ahead of the consumer. With a ``cost`` function
+    all items are read first and submitted most expensive first, with cheap
+    items batched together (see `plan_batches`). Idle workers take the next
+    batch from the shared queue, so a few large items do not hold up the rest.
+    ``batch_func``, if given, is called with a list of items instead of
+    ``func`` for every item, and returns a list of results.
+
+    For the process and interpreter backends ``func``, the items and the
+    results must be picklable.
+    """
+    executor = create_executor(backend, jobs, initializer, initargs)
+    try:
+        if cost is None:
+            yield from _imap_windowed(executor, func, items, window or jobs * 4)
+        else:
+            if batch_func is None:
+                batch_func = functools.partial(call_batch, func)
+            yield from _imap_scheduled(executor, batch_func, list(items), jobs, cost)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _imap_windowed(executor, func, items, window):
+    pending = collections.deque()
+    for item in items:
+        pending.append((item, executor.submit(func, item)))
+        if len(pending) >= window:
+            item, future = pending.popleft()
+            yield item, future.result()
+    while pending:
+        item, future = pending.popleft()
+        yield item, future.result()
+
+
+def _imap_scheduled(executor, batch_func, items, jobs, cost):
+    # For every item: the future of its batch and its position in the batch.
+    located = [None] * len(items)
+    for batch in plan_batches([cost(item) for item in items], jobs):
+        future = executor.submit(batch_func, [items[i] for i in batch])
+        for position, i in enumerate(batch):
+            located[i] = (future, position)
+    for i, item in enumerate(items):
+        future, position = located[i]
+        located[i] = None  # Let finished batches be freed.
+        yield item, future.result()[position]
+
+
+def pack_messages(messages):
+    """Pack messages into nested tuples of strings, integers and None.
+
+    These pickle compactly and can be shared between interpreters.
+    """
+    return tuple(
+        (
+            m.msgctxt,
+            m.msgid,
+            m.msgid_plural,
+            tuple(m.flags),
+            m.comment,
+            m.tcomment,
+            m.location[0],
+            m.location[1],
+        )
+        for m in messages
+    )
+
+
+def unpack_messages(packed):
+    return [
+        Message(msgctxt, msgid, msgid_plural, list(flags), comment, tcomment, (filename, lineno))
+        for (msgctxt, msgid, msgid_plural, flags, comment, tcomment, filename, lineno) in packed
+    ]
+
+
+def init_worker(extensions, configs, options, timeout=None, keep_going=False):
+    """Set up the extractor registry in a process or interpreter worker.
+
+    ``extensions`` and ``configs`` (the configuration of every extractor)
+    come from the parent, so workers do not need to read configuration files.
+    """
+    global _worker_state
+    extractors = {}
+    register_extractors(extractors, {})
+    register_babel_plugins(extractors)
+    for name, config in configs.items():
+        if name in extractors:
+            extractors[name].update_config(**config)
+    _worker_state = (extractors, extensions, options, timeout, keep_going)
+
+
+def extract_batch(filenames, extractor_for, options, timeout=None, keep_going=False):
+    """Extract the messages from a batch of files.
+
+    Files are grouped by extractor, so each extractor can share its setup
+    between its files. Returns a ``(messages, problem)`` pair per file, in
+    order, as produced by `extract_files_within`.
+    """
+    groups = {}
+    for i, filename in enumerate(filenames):
+        groups.setdefault(extractor_for(filename), []).append(i)
+    results = [None] * len(filenames)
+    for extractor, indices in groups.items():
+        extracted = extract_files_within(
+            extractor, [filenames[i] for i in indices], options, timeout, keep_going
+        )
+        for i, result in zip(indices, extracted):
+            results[i] = result
+    return results
+
+
+def extract_batch_in_worker(items):
+    """Extract the messages from ``(target, filename)`` items in a worker.
+
+    Returns packed messages, or None, and a problem for every item.
+    """
+    extractors, extensions, options, timeout, keep_going = _worker_state
+    results = extract_batch(
+        [filename for (_, filename) in items],
+        lambda filename: get_extractor(filename, extractors, extensions),
+        options,
+        timeout,
+        keep_going,
+    )
+    return [
+        (None if messages is None else pack_messages(messages), problem)
+        for (messages, problem) in results
+    ]
+
+
+def extract_in_worker(item):
+    """Extract the messages from a single ``(target, filename)`` item in a worker."""
+    return extract_batch_in_worker([item])[0]
@@ -0,0 +1,94 @@
+import io
+import mmap
+import os
+
+# Files of at least this many bytes are memory-mapped instead of read.
+MMAP_THRESHOLD = 1024 * 1024
+
+
+class _BufferReader(io.RawIOBase):
+    """Read-only raw stream over a bytes-like object."""
+
+    def __init__(self, buffer):
+        self._view = memoryview(buffer)
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(offset, 0)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def readinto(self, b):
+        data = self._view[self._pos : self._pos + len(b)]
+        size = len(data)
+        b[:size] = data
+        self._pos += size
+        return size
+
+    def close(self):
+        if not self.closed:
+            # The view must be released before an mmap can be closed.
+            self._view.release()
+        super().close()
+
+
+class SourceBuffer:
+    """The contents of a source file, read once.
+
+    Small files are read into memory, large files are memory-mapped. The file
+    descriptor is closed as soon as the file has been read or mapped; `close`
+    releases the mapping and all file objects returned by `open`. Use it as a
+    context manager to make sure that happens.
+    """
+
+    def __init__(self, filename, mmap_threshold=MMAP_THRESHOLD):
+        self.filename = filename
+        self._handles = []
+        with open(filename, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size and size >= mmap_threshold:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.data = f.read()
+
+    def __len__(self):
+        return len(self.data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def open(self, mode="rb"):
+        """Return a new file object for the buffer.
+
+        ``mode`` is ``"rb"`` for a binary file object or ``"r"`` for a UTF-8
+        text file object.
+        """
+        fileobj = io.BufferedReader(_BufferReader(self.data))
+        if mode == "r":
+            fileobj = io.TextIOWrapper(fileobj, encoding="utf-8")
+        elif mode != "rb":
+            raise ValueError(f"Unsupported mode: {mode}")
+        self._handles.append(fileobj)
+        return fileobj
+
+    def close(self):
+        for fileobj in self._handles:
+            fileobj.close()
+        self._handles = []
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
@@ -0,0 +1,157 @@
+import asyncio
+import os
+import sys
+
+import click
+import polib
+
+from lingva.aio import ExtractionError, extract_async
+from lingva.extract import _format_key
+from lingva.parallel import BACKENDS, backend_available, imap_ordered
+from lingva.writer import iter_po, wrap_width
+
+# Keys of the messages in use and the prune flag of a worker, set by init_worker.
+_worker_state = None
+
+
+def live_keys(sources, cfg_file=None, domain=None, keywords=None):
+    """Extract messages from sources and return their ``(msgid, msgctxt)`` keys."""
+    catalog = asyncio.run(
+        extract_async(
+            sources,
+            cfg_file=cfg_file,
+            location=False,
+            linenumbers=False,
+            domain=domain,
+            keywords=keywords,
+            comments=False,
+        )
+    )
+    return {(entry.msgid, entry.msgctxt) for entry in catalog}
+
+
+def list_po_files(locale_dir, domain=None):
+    """Return the PO files below a directory, or only those for a domain."""
+    filenames = []
+    for dirpath, dirnames, files in os.walk(locale_dir):
+        dirnames.sort()
+        for name in sorted(files):
+            if (name == f"{domain}.po") if domain else name.endswith(".po"):
+                filenames.append(os.path.join(dirpath, name))
+    return filenames
+
+
+def find_unused(filename, live, prune=False):
+    """Return the keys of the entries in a PO file that are not in ``live``.
+
+    With ``prune`` those entries are removed from the file. The file is
+    written with the width it was wrapped at, so the other entries do not
+    change.
+    """
+    catalog = polib.pofile(filename)
+    unused = [
+        (entry.msgid, entry.msgctxt)
+        for entry in catalog
+        if (entry.msgid, entry.msgctxt) not in live
+    ]
+    if unused and prune:
+        catalog[:] = [entry for entry in catalog if (entry.msgid, entry.msgctxt) in live]
+        with open(filename, encoding=catalog.encoding) as f:
+            catalog.wrapwidth = wrap_width(f.read())
+        with open(filename, "w", encoding=catalog.encoding) as f:
+            f.writelines(iter_po(catalog))
+    return unused
+
+
+def init_worker(live, prune):
+    global _worker_state
+    _worker_state = (live, prune)
+
+
+def find_unused_in_worker(filename):
+    live, prune = _worker_state
+    return find_unused(filename, live, prune)
+
+
+def _file_size(filename):
+    try:
+        return os.path.getsize(filename)
+    except OSError:
+        return 0
+
+
+@click.command()
+@click.option(
+    "-c",
+    "--config",
+    "cfg_file",
+    metavar="CONFIG",
+    help="Read configuration from CONFIG file",
+    type=click.File(),
+)
+@click.option("-d", "--domain", help="Domain to extract, and name of the PO files to check")
+@click.option(
+    "-k",
+    "--keyword",
+    "keywords",
+    metavar="WORD",
+    multiple=True,
+    help="Look for WORD as additional keyword",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    metavar="NUMBER",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of PO files to check at the same time",
+)
+@click.option(
+    "--backend",
+    type=click.Choice(BACKENDS),
+    default="thread",
+    help="Run --jobs workers as threads, processes or subinterpreters",
+)
+@click.option("--prune", is_flag=True, default=False, help="Remove unused entries from the files")
+@click.argument("locale_dir", type=click.Path(exists=True, file_okay=False))
+@click.argument("sources", nargs=-1, required=True, type=click.Path(exists=True))
+def main(cfg_file, domain, keywords, jobs, backend, prune, locale_dir, sources):
+    """Find translations in LOCALE_DIR for messages no longer used in SOURCES."""
+    if not backend_available(backend):
+        click.echo(f"The {backend} backend is not available in this Python version", err=True)
+        sys.exit(1)
+    try:
+        live = live_keys(sources, cfg_file, domain, keywords)
+    except ExtractionError as e:
+        click.echo(e, err=True)
+        sys.exit(1)
+    if not live:
+        # Everything would be unused, which is more likely a mistake.
+        click.echo("No translatable strings found, aborting", err=True)
+        sys.exit(2)
+    filenames = list_po_files(locale_dir, domain)
+    if jobs == 1:
+        results = ((filename, find_unused(filename, live, prune)) for filename in filenames)
+    else:
+        results = imap_ordered(
+            find_unused_in_worker,
+            filenames,
+            jobs,
+            backend=backend,
+            initializer=init_worker,
+            initargs=(live, prune),
+            cost=_file_size,
+        )
+    total = files = 0
+    for filename, unused in results:
+        if not unused:
+            continue
+        total += len(unused)
+        files += 1
+        for key in unused:
+            click.echo(f"{filename}: {_format_key(key)}")
+    if prune:
+        click.echo(f"Removed {total} entries from {files} files", err=True)
+    elif total:
+        click.echo(f"{total} unused entries in {files} files", err=True)
+        sys.exit(1)
@@ -0,0 +1,98 @@
+import contextlib
+import signal
+import threading
+import time
+
+from lingva.extractors import extract_files
+
+
+class FileTimeout(BaseException):
+    """Raised when extracting a file takes longer than its time budget.
+
+    This derives from BaseException so ``except Exception`` blocks in
+    extractors do not swallow it.
+    """
+
+
+def _alarm(signum, frame):
+    raise FileTimeout()
+
+
+@contextlib.contextmanager
+def time_budget(seconds):
+    """Raise :class:`FileTimeout` if the block runs longer than ``seconds``.
+
+    This uses ``SIGALRM``, so it can only interrupt code running in the main
+    thread of the main interpreter on platforms that have it. Elsewhere the
+    block runs to completion. The value of the context manager tells if the
+    budget is enforced.
+    """
+    if not seconds or not hasattr(signal, "setitimer"):
+        yield False
+        return
+    if threading.current_thread() is not threading.main_thread():
+        yield False
+        return
+    try:
+        previous = signal.signal(signal.SIGALRM, _alarm)
+    except ValueError:  # Not the main interpreter
+        yield False
+        return
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield True
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def extract_files_within(extractor, filenames, options, timeout=None, keep_going=False):
+    """Extract the messages from files, with a time budget per file.
+
+    Yields a ``(messages, problem)`` tuple for every file. If the extractor
+    was aborted because it ran out of time, or failed (exited or raised an
+    exception) and ``keep_going`` is set, messages is None and problem
+    describes what happened; extraction continues with the next file. If the
+    budget could not be enforced and the extractor took too long, the
+    messages come with a warning. Without ``keep_going`` extractor errors
+    propagate as usual.
+    """
+    filenames = list(filenames)
+    done = 0
+    while done < len(filenames):
+        # After a failure the extractor starts over with the remaining files.
+        results = extract_files(extractor, filenames[done:], options)
+        try:
+            for filename in filenames[done:]:
+                done += 1
+                start = time.monotonic()
+                try:
+                    with time_budget(timeout):
+                        messages = next(results)
+                except FileTimeout:
+                    elapsed = time.monotonic() - start
+                    yield None, f"Aborted extracting {filename} after {elapsed:.1f} seconds"
+                    break
+                except SystemExit:
+                    if not keep_going:
+                        raise
+                    yield None, f"Skipping {filename} because of errors"
+                    break
+                except Exception as e:
+                    if not keep_going:
+                        raise
+                    yield None, f"Skipping {filename}: {e}"
+                    break
+                elapsed = time.monotonic() - start
+                if timeout and elapsed > timeout:
+                    yield (
+                        messages,
+                        (
+                            f"Extracting {filename} took {elapsed:.1f} seconds, "
+                            f"longer than the {timeout} second limit"
+                        ),
+                    )
+                else:
+                    yield messages, None
+        finally:
+            results.close()
@@ -0,0 +1,230 @@
+import math
+import re
+import textwrap
+
+import polib
+
+# Characters that polib escapes, or that make str.splitlines() split a field.
+_NOT_PLAIN = re.compile(r'[\\"\t\n\r\v\b\f\x1c\x1d\x1e\x85\u2028\u2029]')
+# Occurrence lists with these can not be wrapped by just splitting on spaces.
+_WRAP_UNSAFE = re.compile(r"[\t\n\x0b\x0c\r*]|  |^ | $")
+# Lines of a PO file that start a field, continue it, or list occurrences.
+_FIELD_LINE = re.compile(r'(?:#~ )?(msgctxt|msgid|msgid_plural|msgstr(?:\[\d+\])?) "(.*)"')
+_CONTINUATION_LINE = re.compile(r'(?:#~ )?"(.*)"')
+# Characters polib counts when it decides whether a field needs wrapping.
+_SPECIAL_CHARS = '\\\n\r\t\v\b\f"'
+
+
+def wrap_words(words, width):
+    """Greedily wrap words separated by single spaces into lines.
+
+    This matches ``textwrap.wrap`` with ``break_long_words=False`` for text
+    without other whitespace.
+    """
+    lines = []
+    line = []
+    length = 0
+    for word in words:
+        if line and length + 1 + len(word) <= width:
+            line.append(word)
+            length += 1 + len(word)
+            continue
+        if line:
+            lines.append(" ".join(line))
+        line = [word]
+        length = len(word)
+    if line:
+        lines.append(" ".join(line))
+    return lines
+
+
+def _format_comments(ret, value, prefix, wrapwidth):
+    for comment in value.split("\n"):
+        if wrapwidth > 0 and len(comment) + len(prefix) > wrapwidth:
+            ret += textwrap.wrap(
+                comment,
+                wrapwidth,
+                initial_indent=prefix,
+                subsequent_indent=prefix,
+                break_long_words=False,
+            )
+        else:
+            ret.append(prefix + comment)
+
+
+def _format_occurrences(ret, occurrences, wrapwidth):
+    filestr = " ".join(f"{fpath}:{lineno}" if lineno else fpath for (fpath, lineno) in occurrences)
+    if wrapwidth <= 0 or len(filestr) + 3 <= wrapwidth:
+        ret.append("#: " + filestr)
+    elif _WRAP_UNSAFE.search(filestr) is None:
+        ret += ["#: " + line for line in wrap_words(filestr.split(" "), wrapwidth - 3)]
+    else:
+        # Same trick as polib: stop textwrap from breaking on hyphens.
+        ret += [
+            line.replace("*", "-")
+            for line in textwrap.wrap(
+                filestr.replace("-", "*"),
+                wrapwidth,
+                initial_indent="#: ",
+                subsequent_indent="#: ",
+                break_long_words=False,
+            )
+        ]
+
+
+def _format_field(ret, entry, fieldname, plural_index, field, wrapwidth):
+    if _NOT_PLAIN.search(field) is None and (
+        wrapwidth <= 0 or len(field) <= wrapwidth - len(fieldname) - len(plural_index) - 3
+    ):
+        ret.append(f'{fieldname}{plural_index} "{field}"')
+    else:
+        ret += entry._str_field(fieldname, "", plural_index, field, wrapwidth)
+
+
+def format_entry(entry, wrapwidth):
+    """Return the PO representation of an entry, as polib would write it."""
+    if (
+        entry.obsolete
+        or entry.previous_msgctxt is not None
+        or entry.previous_msgid is not None
+        or entry.previous_msgid_plural is not None
+    ):
+        return entry.__unicode__(wrapwidth)
+    ret = []
+    tcomment = entry.tcomment
+    if tcomment:
+        _format_comments(ret, tcomment, "# ", wrapwidth)
+    comment = entry.comment
+    if comment:
+        _format_comments(ret, comment, "#. ", wrapwidth)
+    if entry.occurrences:
+        _format_occurrences(ret, entry.occurrences, wrapwidth)
+    if entry.flags:
+        ret.append("#, " + ", ".join(entry.flags))
+    if entry.msgctxt is not None:
+        _format_field(ret, entry, "msgctxt", "", entry.msgctxt, wrapwidth)
+    _format_field(ret, entry, "msgid", "", entry.msgid, wrapwidth)
+    if entry.msgid_plural:
+        _format_field(ret, entry, "msgid_plural", "", entry.msgid_plural, wrapwidth)
+    if entry.msgstr_plural:
+        msgstr_plural = entry.msgstr_plural
+        for index in sorted(msgstr_plural):
+            _format_field(ret, entry, "msgstr", f"[{index}]", msgstr_plural[index], wrapwidth)
+    else:
+        _format_field(ret, entry, "msgstr", "", entry.msgstr, wrapwidth)
+    ret.append("")
+    return "\n".join(ret)
+
+
+def _field_length(name, value):
+    # The smallest width at which polib writes a field on one line, see
+    # POEntry._str_field.
+    return len(value) + len(name) + 3 - sum(value.count(c) for c in _SPECIAL_CHARS)
+
+
+def _po_runs(lines):
+    """Yield ``(kind, name, parts)`` for the fields and occurrence lists in PO lines.
+
+    ``kind`` is ``"field"`` or ``"occurrences"``. ``parts`` holds the quoted
+    text of each line of a field, or each ``#:`` line without its prefix.
+    """
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        i += 1
+        m = _FIELD_LINE.fullmatch(line)
+        if m is not None:
+            parts = [m.group(2)]
+            while i < len(lines) and (c := _CONTINUATION_LINE.fullmatch(lines[i])):
+                parts.append(c.group(1))
+                i += 1
+            yield "field", m.group(1), parts
+        elif line.startswith("#: "):
+            parts = [line[3:]]
+            while i < len(lines) and lines[i].startswith("#: "):
+                parts.append(lines[i][3:])
+                i += 1
+            yield "occurrences", None, parts
+
+
+def wrap_width(text):
+    """Guess the width a PO file was wrapped at by lingva or polib.
+
+    Fields, occurrence lists and comments written on one line give a lower
+    bound, wrapped ones an upper bound; the smallest width in between that
+    wraps every wrapped item the same way is returned. Returns 0 if nothing
+    was wrapped, since then not wrapping keeps every line as it is.
+    """
+    lines = text.splitlines()
+    lower = 1
+    upper = math.inf
+    wrapped = []
+    in_header = True
+    for line in lines:
+        if line.startswith("msgid "):
+            in_header = False
+        if in_header:
+            continue  # The header comment is never wrapped
+        comment = line[3:] if line.startswith("#. ") else line[2:] if line.startswith("# ") else ""
+        if " " in comment.strip():
+            # Longer comments with a space would be wrapped.
+            lower = max(lower, len(line))
+    for kind, name, parts in _po_runs(lines):
+        if kind == "occurrences":
+            length = len(" ".join(parts)) + 3
+            if len(parts) == 1:
+                lower = max(lower, length)
+            else:
+                upper = min(upper, length)
+                wrapped.append((kind, name, parts))
+            continue
+        value = polib.unescape("".join(parts))
+        if len(value.splitlines()) > 1:
+            continue  # polib never wraps fields with several lines
+        length = _field_length(name, value)
+        if len(parts) == 1:
+            if value:  # Empty fields are never wrapped
+                lower = max(lower, length)
+        elif not parts[0]:
+            upper = min(upper, length)
+            wrapped.append((kind, name, parts))
+    if upper == math.inf:
+        return 0
+    for width in range(lower, upper):
+        if all(_wraps_as(width, *item) for item in wrapped):
+            return width
+    return lower
+
+
+def _wraps_as(width, kind, name, parts):
+    if kind == "occurrences":
+        ret = []
+        _format_occurrences(ret, [(p, "") for p in " ".join(parts).split(" ")], width)
+        return ret == ["#: " + part for part in parts]
+    wrapped = textwrap.wrap(
+        "".join(parts), width - 2, drop_whitespace=False, break_long_words=False
+    )
+    return wrapped == parts[1:]
+
+
+def iter_po(catalog):
+    """Generate the PO representation of a catalog in chunks.
+
+    The joined chunks are identical to ``catalog.__unicode__()``.
+    """
+    for header in catalog.header.split("\n"):
+        if not header:
+            yield "#\n"
+        elif header[:1] in [",", ":"]:
+            yield f"#{header}\n"
+        else:
+            yield f"# {header}\n"
+    wrapwidth = catalog.wrapwidth
+    yield catalog.metadata_as_entry().__unicode__(wrapwidth)
+    for entry in catalog:
+        if not entry.obsolete:
+            yield "\n"
+            yield format_entry(entry, wrapwidth)
+    for entry in catalog.obsolete_entries():
+        yield "\n"
+        yield entry.__unicode__(wrapwidth)
@@ -1,6 +1,27 @@
+import io
+import random
+import re
+
 import pytest
 
-from lingva.extractors import Extractor, Keyword, check_c_format
+from lingva.extractors import (
+    _C_FORMAT,
+    _PYTHON_FORMAT,
+    KEYWORDS,
+    ExtractionSession,
+    Extractor,
+    ExtractorOptions,
+    Keyword,
+    Message,
+    check_c_format,
+    check_formats,
+    comment_mode_for,
+    detect_formats,
+    extract_files,
+    keywords_for,
+    register_format,
+    unregister_format,
+)
 
 
 def test_no_format():
@@ -41,6 +62,39 @@ def test_strftime_is_not_c_format():
     assert "c-format" not in flags
 
 
+def test_check_formats():
+    flags = []
+    check_formats("%(count)d of {total}", flags)
+    assert flags == ["python-format"]
+    flags = ["no-python-format"]
+    check_formats("%s and {0}", flags)
+    assert flags == ["no-python-format", "c-format"]
+
+
+def test_detect_formats_matches_separate_scans():
+    rng = random.Random(42)
+    for _ in range(2000):
+        buf = "".join(rng.choice("%%{}sd.1l x_:!r") for _ in range(rng.randrange(12)))
+        formats = list(re.finditer("%(?!%)", buf))
+        expected = []
+        if formats and all(_C_FORMAT.match(buf[m.start() :]) for m in formats):
+            expected.append("c-format")
+        if _PYTHON_FORMAT.search(buf):
+            expected.append("python-format")
+        assert detect_formats(buf) == tuple(expected), buf
+
+
+def test_register_format():
+    register_format("python-brace-format", "{", re.compile(r"\{\w*\}"))
+    try:
+        flags = []
+        check_formats("Hello {name}", flags)
+        assert flags == ["python-format", "python-brace-format"]
+    finally:
+        unregister_format("python-brace-format")
+    assert detect_formats("Hello {name}") == ("python-format",)
+
+
 class TestKeywordFromSpec:
     def test_minimal(self):
         kw = Keyword.from_spec("gettext")
@@ -78,3 +132,65 @@ class TestKeywordFromSpec:
 def test_extractor():
     with pytest.raises(TypeError):
         Extractor()
+
+
+def test_extract_many_default():
+    class LineExtractor(Extractor):
+        extensions = [".txt"]
+        source_mode = "r"
+
+        def __call__(self, filename, options, fileobj=None):
+            return [
+                Message(None, line.strip(), None, [], "", "", (filename, lineno))
+                for lineno, line in enumerate(fileobj, 1)
+            ]
+
+    files = [("a.txt", io.StringIO("One\nTwo\n")), ("b.txt", io.StringIO("Three\n"))]
+    results = list(LineExtractor().extract_many(files, None))
+    assert [[m.msgid for m in messages] for messages in results] == [["One", "Two"], ["Three"]]
+
+
+def test_extract_files(tmp_path):
+    opened = []
+
+    class OpenedExtractor(Extractor):
+        extensions = [".txt"]
+        source_mode = "rb"
+
+        def __call__(self, filename, options, fileobj=None):
+            opened.append(fileobj)
+            return [Message(None, fileobj.read().decode(), None, [], "", "", (filename, 1))]
+
+    for name in "ab":
+        (tmp_path / f"{name}.txt").write_text(name)
+    filenames = [str(tmp_path / "a.txt"), str(tmp_path / "b.txt")]
+    results = extract_files(OpenedExtractor(), filenames, None)
+    assert [m.msgid for m in next(results)] == ["a"]
+    assert not opened[0].closed
+    assert [m.msgid for m in next(results)] == ["b"]
+    assert opened[0].closed
+
+
+def test_extraction_session_resolves_keywords_once():
+    session = ExtractionSession(comment_tag=True, domain=None, keywords=["_:1,2"])
+    assert keywords_for(session) is session.keyword_table
+    assert session.keyword_table["_"].msgid_plural_param == 2
+    assert "_" not in KEYWORDS
+
+
+def test_keywords_for_plain_options():
+    options = ExtractorOptions(comment_tag=True, domain=None, keywords=["tr"])
+    keywords = keywords_for(options)
+    assert "tr" in keywords and "gettext" in keywords
+    assert keywords_for(options) is not keywords
+
+
+@pytest.mark.parametrize(
+    "comments,comment_tag,mode",
+    [(True, True, "all"), (True, "I18N:", "tagged"), (True, None, "none"), (False, True, "none")],
+)
+def test_comment_mode(comments, comment_tag, mode):
+    session = ExtractionSession(comment_tag, None, [], comments=comments)
+    assert session.comment_mode == mode
+    options = ExtractorOptions(comment_tag, None, [], comments=comments)
+    assert comment_mode_for(options) == mode
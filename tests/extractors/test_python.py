@@ -4,6 +4,7 @@ from unittest import mock
 
 import pytest
 
+from lingva.extractors import ExtractionSession, python
 from lingva.extractors.python import PythonExtractor
 
 python_extractor = PythonExtractor()
@@ -133,6 +134,19 @@ def test_include_all_comments():
     assert messages[0].comment == "source comment"
 
 
+@pytest.mark.usefixtures("fake_source")
+def test_comments_not_wanted():
+    global source
+    options = mock.Mock()
+    options.keywords = []
+    options.comment_tag = True
+    options.comments = False
+    source = """# source comment\n_(u'key', default='word')"""
+    messages = list(python_extractor("filename", options))
+    assert len(messages) == 1
+    assert messages[0].comment == ""
+
+
 @pytest.mark.usefixtures("fake_source")
 def test_tagged_comment_on_previous_line():
     global source
@@ -257,3 +271,224 @@ def test_bytes_input():
         )
         assert len(messages) == 1
         assert messages[0].msgid == "word"
+
+
+def test_extract_many():
+    options = mock.Mock()
+    options.keywords = ["other"]
+    files = [
+        ("a.py", io.StringIO("_('One')\nother('Two')\n")),
+        ("b.py", io.StringIO("gettext('Three')\n")),
+    ]
+    results = list(python_extractor.extract_many(files, options))
+    assert [[(m.msgid, m.location) for m in messages] for messages in results] == [
+        [("One", ("a.py", 1)), ("Two", ("a.py", 2))],
+        [("Three", ("b.py", 1))],
+    ]
+
+
+ENGINE_SOURCES = [
+    """_(u'őne two '\n'three')""",
+    """ngettext(u'one côw', u'%d cows', 5)""",
+    """_("Hello", mapping={"name": name}, default="Hello ${name}")""",
+    """pgettext("menu", 'Open')\nnpgettext("menu", "file", "files", n)""",
+    """# I18N: a comment\n# continued\n_("Comment above")\n""",
+    """_("Same line")  # I18N: on the same line\n""",
+    """_(  # A comment inside the call\n    "Inside",\n)\n""",
+    """_("Skipped", {"a": "# not a comment", "b": _("Nested")})""",
+    """_("With {args}", [1, 2, 3], key=("x", "y"))""",
+    """x = _\n("Parenthesis on the next line")\n""",
+    """class _(Base):\n    pass\n_("After class")\n""",
+    """self._("Attribute call")\nself._[lang].gettext(item.name)\n""",
+    """print(f"{value}")  # A comment\n_("Plain # not a comment")\n""",
+    """s = '''\n# not a comment\n'''\n_("After string") # a comment\n""",
+    """def f(x=_("Default")):\n    return gettext(x)\n""",
+    """@decorate(_("In a decorator"))\ndef f():\n    pass\n""",
+    """_("Numbers", 12)\n_("Keyword value", default=None)\n""",
+    """#: flag: python-format\n_("Flagged %s")\n""",
+]
+
+
+@pytest.mark.parametrize("code", ENGINE_SOURCES)
+@pytest.mark.parametrize("comments,comment_tag", [(True, True), (True, "I18N:"), (False, True)])
+def test_ast_engine_matches_token_engine(code, comments, comment_tag):
+    options = mock.Mock()
+    options.keywords = []
+    options.comments = comments
+    options.comment_tag = comment_tag
+    options.domain = None
+    results = []
+    for engine in ["token", "ast"]:
+        extractor = PythonExtractor({"engine": engine})
+        messages = extractor("filename", options, io.StringIO(code))
+        results.append(
+            [
+                (m.msgctxt, m.msgid, m.msgid_plural, m.flags, m.comment, m.location)
+                for m in messages
+            ]
+        )
+    assert results[0] == results[1]
+
+
+def test_ast_engine_falls_back_on_syntax_errors():
+    options = mock.Mock()
+    options.keywords = []
+    extractor = PythonExtractor({"engine": "ast"})
+    with pytest.raises(SystemExit):
+        extractor("filename", options, io.StringIO("""def class xya _(u'føo' 1)"""))
+
+
+def test_unknown_engine():
+    options = mock.Mock()
+    options.keywords = []
+    extractor = PythonExtractor({"engine": "magic"})
+    with pytest.raises(SystemExit):
+        extractor("filename", options, io.StringIO("_('One')"))
+
+
+WINDOW_SOURCES = [
+    """x = _\n\n("Call on a later line")\n""",
+    """x = _\n_("Swallowed by the previous keyword")\n""",
+    """x = 1  # I18N: trailing comment\n_("Below a comment")\n""",
+    """items = [\n    1,  # I18N: inside brackets\n]\n_("After brackets")\n""",
+    """doc = \"\"\"\n_("Not a call")\n\"\"\"\n_("After a string")\n""",
+    """def f():\n    if x:\n        return _("Deep")\n    return _("Shallow")\n""",
+    """y = 1 + \\\n    _("Continued")\n""",
+    """_("First")  # I18N: same line\n# I18N: above\n_("Second")""",
+    """class A:\n    def f(self):\n        x = 1\n# I18N: odd\n        return _("a")\n"""
+    """    def g(self):\n        return _("b")\n""",
+]
+
+
+@pytest.mark.parametrize("code", ENGINE_SOURCES + WINDOW_SOURCES)
+@pytest.mark.parametrize("comments,comment_tag", [(True, True), (True, "I18N:"), (False, True)])
+def test_windowed_tokenizing_matches_full_tokenizing(code, comments, comment_tag):
+    options = mock.Mock()
+    options.keywords = []
+    options.comments = comments
+    options.comment_tag = comment_tag
+    options.domain = None
+    code = "value = 1\n" * 50 + code + "\nvalue = 2\n" * 50
+    results = []
+    for size in [len(code) + 1, 0]:
+        with mock.patch.object(python, "WINDOWED_MIN_SIZE", size):
+            messages = python_extractor("filename", options, io.StringIO(code))
+        results.append(messages)
+    assert results[0] == results[1]
+
+
+@pytest.mark.parametrize("code", ENGINE_SOURCES + WINDOW_SOURCES)
+def test_split_source(code):
+    options = mock.Mock()
+    options.keywords = []
+    options.comment_tag = True
+    options.domain = None
+    code = "value = 1\n" + code + "\nvalue = 2\n"
+    parts = python_extractor.split_source(code, options)
+    assert len(parts) > 1
+    lines = code.split("\n")
+    messages = []
+    for first, end in parts:
+        text = "\n".join(lines[first - 1 : end - 1]) + "\n"
+        messages += python_extractor("filename", options, io.StringIO(text), first - 1)
+    assert messages == python_extractor("filename", options, io.StringIO(code))
+
+
+def test_split_source_many_comment_blocks():
+    options = mock.Mock()
+    options.keywords = []
+    code = "".join(
+        f"# Comment {i}\n# more\ndef f{i}():\n    return _('{i}')\n" for i in range(20000)
+    )
+    parts = python_extractor.split_source(code, options)
+    assert len(parts) == 20000
+    assert parts[1] == (5, 9)
+
+
+def test_token_windows():
+    code = "a = 1\n# A comment\nb = _(\n    'x')\nc = 2\n"
+    assert python._token_windows(code, frozenset({"_"}), True) == [(2, 5)]
+    assert python._token_windows(code, frozenset({"_"}), False) == [(3, 5)]
+
+
+def test_token_windows_unterminated_string():
+    with pytest.raises(python._Ambiguous):
+        python._token_windows("a = 'x\n_('y')\n", frozenset({"_"}), True)
+
+
+def test_windowed_tokenizing_falls_back():
+    options = mock.Mock()
+    options.keywords = []
+    with mock.patch.object(python, "WINDOWED_MIN_SIZE", 0):
+        with pytest.raises(SystemExit):
+            python_extractor("filename", options, io.StringIO("value = [\n_('x')\n"))
+
+
+PARALLEL_SOURCE = "".join(
+    f"# I18N: Comment {i}\ndef view_{i}():\n    return _('Message {i}')\n\n" for i in range(40)
+)
+
+
+def test_parallel_extraction():
+    options = ExtractionSession(True, None, [])
+    expected = python_extractor("filename", options, io.StringIO(PARALLEL_SOURCE), 10)
+    with mock.patch.object(python, "PARALLEL_MIN_SIZE", 0):
+        extractor = PythonExtractor({"jobs": "2"})
+        messages = extractor("filename", options, io.StringIO(PARALLEL_SOURCE), 10)
+    assert messages == expected
+    assert messages[-1].location == ("filename", 169)
+
+
+def test_parallel_extraction_without_processes():
+    options = ExtractionSession(True, None, [])
+    expected = python_extractor("filename", options, io.StringIO(PARALLEL_SOURCE))
+    with mock.patch.object(python, "PARALLEL_MIN_SIZE", 0):
+        with mock.patch(
+            "concurrent.futures.ProcessPoolExecutor.submit",
+            side_effect=RuntimeError("No processes in this interpreter"),
+        ):
+            messages = PythonExtractor({"jobs": "2"})(
+                "filename", options, io.StringIO(PARALLEL_SOURCE)
+            )
+    assert messages == expected
+
+
+def test_parallel_extraction_interrupted():
+    class Interrupted(BaseException):
+        pass
+
+    options = ExtractionSession(True, None, [])
+    executor = mock.Mock()
+    executor.submit.return_value.result.side_effect = Interrupted()
+    with mock.patch.object(python, "PARALLEL_MIN_SIZE", 0):
+        with mock.patch("concurrent.futures.ProcessPoolExecutor", return_value=executor):
+            with pytest.raises(Interrupted):
+                PythonExtractor({"jobs": "2"})("filename", options, io.StringIO(PARALLEL_SOURCE))
+    executor.shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+
+
+def test_parallel_extraction_error(capsys):
+    options = ExtractionSession(True, None, [])
+    source = PARALLEL_SOURCE + "_('Broken' 1)\n"
+    with mock.patch.object(python, "PARALLEL_MIN_SIZE", 0):
+        with pytest.raises(SystemExit):
+            PythonExtractor({"jobs": "2"})("filename", options, io.StringIO(source))
+    assert capsys.readouterr().err.count("Aborting") == 1
+
+
+def test_parallel_extraction_in_parallel_run():
+    options = ExtractionSession(True, None, [], parallel=True)
+    with mock.patch.object(python, "PARALLEL_MIN_SIZE", 0):
+        with mock.patch("concurrent.futures.ProcessPoolExecutor") as executor:
+            messages = PythonExtractor({"jobs": "2"})(
+                "filename", options, io.StringIO(PARALLEL_SOURCE)
+            )
+    executor.assert_not_called()
+    assert len(messages) == 40
+
+
+def test_invalid_jobs():
+    options = mock.Mock()
+    options.keywords = []
+    with pytest.raises(SystemExit):
+        PythonExtractor({"jobs": "many"})("filename", options, io.StringIO("_('One')"))
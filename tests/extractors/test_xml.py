@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from unittest import mock
 
@@ -832,3 +833,66 @@ def test_context_for_attributes():
     messages = list(xml_extractor("filename", _options()))
     assert len(messages) == 1
     assert messages[0].msgctxt == "figure"
+
+
+@pytest.mark.usefixtures("fake_source")
+def test_skip_line_counting():
+    global source
+    source = """<html xmlns:i18n="http://xml.zope.org/namespaces/i18n"
+                      i18n:domain="lingva">
+                  <dummy i18n:attributes="title" title="tést title"/>
+                  <dummy i18n:translate="">Dummy</dummy>
+                </html>
+                """.encode()
+    with mock.patch("lingva.extractors.xml.get_newline_count") as get_newline_count:
+        messages = list(xml_extractor("filename", _options(linenumbers=False)))
+    assert not get_newline_count.called
+    assert [m.msgid for m in messages] == ["tést title", "Dummy"]
+
+
+@pytest.mark.usefixtures("fake_source")
+def test_skip_comments():
+    global source
+    source = b"""\
+                <html xmlns:i18n="http://xml.zope.org/namespaces/i18n"
+                      i18n:domain="lingva" i18n:comment="Comment">
+                  <p i18n:translate="msgid">Dummy <span i18n:name="foo"
+                     i18n:translate="">text</span></p>
+                  <dummy i18n:attributes="title msg_title" title="test title"/>
+                </html>"""
+    messages = list(xml_extractor("filename", _options(comments=False)))
+    assert [m.msgid for m in messages] == ["text", "msgid", "msg_title"]
+    assert [m.comment for m in messages] == ["", "", ""]
+
+
+def test_concurrent_calls():
+    def run(i):
+        source = (
+            '<html xmlns:i18n="http://xml.zope.org/namespaces/i18n" i18n:domain="lingva">'
+            + "<p>\n</p>" * i
+            + f'<p i18n:translate="">Message {i}</p></html>'
+        )
+        return list(xml_extractor(f"file{i}", _options(), BytesIO(source.encode())))
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(run, range(50)))
+    for i, messages in enumerate(results):
+        assert [(m.msgid, m.location) for m in messages] == [(f"Message {i}", (f"file{i}", i + 1))]
+
+
+def test_extract_many():
+    sources = [
+        b'<html xmlns:i18n="http://xml.zope.org/namespaces/i18n" i18n:domain="lingva">'
+        + b"<p>\n</p>" * i
+        + f'<p i18n:translate="">Message {i}</p>${{_("Python {i}")}}</html>'.encode()
+        for i in range(3)
+    ]
+    files = [(f"file{i}", BytesIO(source)) for (i, source) in enumerate(sources)]
+    results = list(xml_extractor.extract_many(files, _options()))
+    assert [[m.msgid for m in messages] for messages in results] == [
+        [f"Message {i}", f"Python {i}"] for i in range(3)
+    ]
+    assert results == [
+        xml_extractor(f"file{i}", _options(), BytesIO(source))
+        for (i, source) in enumerate(sources)
+    ]
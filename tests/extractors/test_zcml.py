@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from unittest import mock
 
@@ -93,3 +94,21 @@ def test_abort_on_syntax_error():
     source = b"""<configure"""
     with pytest.raises(SystemExit):
         list(zcml_extractor("filename", _options()))
+
+
+def test_concurrent_calls():
+    sources = [
+        f'<configure i18n_domain="lingva">{"<dummy/>" * i}<dummy title="title {i}"/></configure>'
+        for i in range(50)
+    ]
+    with ThreadPoolExecutor(8) as executor:
+        results = list(
+            executor.map(
+                lambda i: list(
+                    zcml_extractor(f"file{i}", _options(), BytesIO(sources[i].encode()))
+                ),
+                range(50),
+            )
+        )
+    for i, messages in enumerate(results):
+        assert [(m.msgid, m.location) for m in messages] == [(f"title {i}", (f"file{i}", 1))]
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from lingva.aio import ExtractionError, aiter_messages, extract_async
+from lingva.extract import ExtractorOptions
+from lingva.extractors import EXTENSIONS, EXTRACTORS
+from lingva.extractors.python import KEYWORDS
+
+
+@pytest.fixture
+def sources(tmp_path):
+    (tmp_path / "a.py").write_text("_('Hello')\nother('Other')\n")
+    (tmp_path / "b.pt").write_text(
+        '<p xmlns:i18n="http://xml.zope.org/namespaces/i18n" i18n:domain="test"'
+        ' i18n:translate="">Template</p>\n'
+    )
+    (tmp_path / "c.txt").write_text("Not a source file\n")
+    return tmp_path
+
+
+def test_extract_async(sources):
+    extractors = dict(EXTRACTORS)
+    extensions = dict(EXTENSIONS)
+    keywords = dict(KEYWORDS)
+    catalog = asyncio.run(extract_async([str(sources)], keywords=["other"], sort_order="msgid"))
+    assert [entry.msgid for entry in catalog] == ["Hello", "Other", "Template"]
+    assert catalog[0].occurrences == [(str(sources / "a.py"), "1")]
+    assert EXTRACTORS == extractors
+    assert EXTENSIONS == extensions
+    assert KEYWORDS == keywords
+
+
+def test_concurrent_calls_use_own_keywords(sources):
+    async def run():
+        return await asyncio.gather(
+            extract_async([str(sources / "a.py")]),
+            extract_async([str(sources / "a.py")], keywords=["other"]),
+        )
+
+    default, other = asyncio.run(run())
+    assert [entry.msgid for entry in default] == ["Hello"]
+    assert [entry.msgid for entry in other] == ["Hello", "Other"]
+
+
+def test_aiter_messages_stop_early(sources):
+    options = ExtractorOptions(comment_tag=True, domain=None, keywords=[])
+
+    async def run():
+        messages = aiter_messages([str(sources)], options, prefetch=1)
+        async for message in messages:
+            await messages.aclose()
+            return message
+
+    assert asyncio.run(run()).msgid == "Hello"
+
+
+def test_aiter_messages_cancel(sources):
+    options = ExtractorOptions(comment_tag=True, domain=None, keywords=[])
+
+    async def consume():
+        async for _ in aiter_messages([str(sources)], options):
+            await asyncio.sleep(10)
+
+    async def run():
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+
+
+def test_parse_error(tmp_path, capsys):
+    (tmp_path / "a.py").write_text("_('Unterminated\n")
+
+    async def run():
+        await extract_async([str(tmp_path / "a.py")])
+
+    with pytest.raises(ExtractionError):
+        asyncio.run(run())
+    assert "Aborting due to parse error" in capsys.readouterr().err
+
+
+def test_invalid_keyword(sources):
+    with pytest.raises(ExtractionError):
+        asyncio.run(extract_async([str(sources / "a.py")], keywords=["foo:x"]))
@@ -0,0 +1,93 @@
+import json
+
+from click.testing import CliRunner
+
+from lingva.diff import compare_catalogs, main, read_catalog
+
+OLD = """\
+#. Shown on the start page
+#: a.py:1 b.py:2
+#, python-format
+msgid "Hello {name}"
+msgstr ""
+
+#: a.py:3
+msgid "Removed"
+msgstr ""
+
+#. A comment that is long enough to be wrapped
+#: a.py:4
+msgid "Same"
+msgstr ""
+"""
+
+NEW = """\
+#. Shown on the start page
+#: a.py:1 c.py:9
+msgid "Hello {name}"
+msgstr ""
+
+#. A comment that is long enough
+#. to be wrapped
+#: a.py:5
+msgid "Same"
+msgstr ""
+
+#: a.py:6
+msgctxt "menu"
+msgid "Added"
+msgstr ""
+"""
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+
+def test_compare_catalogs(tmp_path):
+    old = read_catalog(write(tmp_path, "old.pot", OLD))
+    new = read_catalog(write(tmp_path, "new.pot", NEW))
+    assert compare_catalogs(old, new) == [
+        (
+            "~",
+            ("Hello {name}", None),
+            {
+                "flags": {"added": [], "removed": ["python-format"]},
+                "occurrences": {"added": ["c.py:9"], "removed": ["b.py:2"]},
+            },
+        ),
+        ("~", ("Same", None), {"occurrences": {"added": ["a.py:5"], "removed": ["a.py:4"]}}),
+        ("+", ("Added", "menu"), None),
+        ("-", ("Removed", None), None),
+    ]
+    assert [kind for (kind, _, _) in compare_catalogs(old, new, ignore_occurrences=True)] == [
+        "~",
+        "+",
+        "-",
+    ]
+    assert compare_catalogs(new, new) == []
+
+
+def test_main(tmp_path):
+    old = write(tmp_path, "old.pot", OLD)
+    new = write(tmp_path, "new.pot", NEW)
+    result = CliRunner().invoke(main, ["--ignore-occurrences", old, new])
+    assert result.exit_code == 1
+    assert result.output == (
+        '~ msgid "Hello {name}"\n'
+        "    flags: -python-format\n"
+        '+ msgctxt "menu" msgid "Added"\n'
+        '- msgid "Removed"\n'
+    )
+    result = CliRunner().invoke(main, ["--format", "jsonl", old, new])
+    changes = [json.loads(line) for line in result.output.splitlines()]
+    assert [(c["change"], c["msgid"]) for c in changes] == [
+        ("changed", "Hello {name}"),
+        ("changed", "Same"),
+        ("added", "Added"),
+        ("removed", "Removed"),
+    ]
+    assert CliRunner().invoke(main, [new, new]).exit_code == 0
+    assert CliRunner().invoke(main, [old, write(tmp_path, "bad.jsonl", "{")]).exit_code == 2
@@ -1,7 +1,27 @@
+import json
+import os
+import random
+from unittest import mock
+
 import polib
+import pytest
 
-from lingva.extract import POEntry, POFile, identical, read_config, strip_linenumbers
-from lingva.extractors import EXTENSIONS, register_extractors
+from lingva.extract import (
+    DirectorySnapshot,
+    POEntry,
+    POFile,
+    _location_sort_key,
+    extract,
+    identical,
+    match_output,
+    parse_output_map,
+    read_config,
+    strip_linenumbers,
+    walk_directory,
+)
+from lingva.extractors import EXTENSIONS, EXTRACTORS, Extractor, Message, register_extractors
+from lingva.index import MessageIndex
+from lingva.parallel import backend_available
 
 STRIPPED_LINENUMBERS_PO = """\
 #: file.txt
@@ -58,6 +78,35 @@ class Test_identical:
         b[0].comment = "Comment\none"
         assert identical(a, b)
 
+    def test_comment_fingerprint_follows_changes(self):
+        a = POFile()
+        b = POFile()
+        a.append(POEntry(msgid="id"))
+        b.append(POEntry(msgid="id"))
+        a[0]._comments.append("Comment one")
+        b[0]._comments.append("Comment\n one")
+        assert a[0].comment_fingerprint == ("Comment one", "")
+        assert identical(a, b)
+        b[0]._tcomments.append("Translator")
+        assert not identical(a, b)
+        a[0].update(
+            Message(None, "id", None, [], "Comment one", "Translator", ("a.py", 1)),
+            add_occurrences=False,
+        )
+        assert identical(a, b)
+
+    def test_comment_fingerprint_kept_up_to_date(self):
+        entry = POEntry(msgid="id")
+        entry.update(Message(None, "id", None, [], "Comment\n one", "", ("a.py", 1)))
+        entry.update(Message(None, "id", None, [], "", "", ("a.py", 2)))
+        assert entry._fingerprint == ("Comment one", "")
+        entry.limit_occurrences(1)
+        assert entry._fingerprint == (
+            "Comment one Used in 2 locations, only the first 1 are listed",
+            "",
+        )
+        assert entry.comment_fingerprint is entry._fingerprint
+
     def test_strip_linenumbers(self):
         a = POFile()
         b = polib.pofile(STRIPPED_LINENUMBERS_PO)
@@ -66,9 +115,465 @@ class Test_identical:
             strip_linenumbers(entry)
         assert identical(a, b)
 
+    def test_update_without_linenumbers(self):
+        a = POFile()
+        b = polib.pofile(STRIPPED_LINENUMBERS_PO)
+        entry = POEntry(msgid="A")
+        for lineno in (1, 5):
+            entry.update(
+                Message(None, "A", None, [], "", "", ("file.txt", lineno)), linenumbers=False
+            )
+        a.append(entry)
+        assert identical(a, b)
+
+    def test_limit_occurrences(self):
+        entry = POEntry(msgid="A")
+        for filename, lineno in [("b.py", 1), ("a.py", 10), ("a.py", 9), ("c.py", 3)]:
+            entry.update(Message(None, "A", None, [], "", "", (filename, lineno)))
+        entry.limit_occurrences(2)
+        assert entry.occurrences == [("a.py", "9"), ("a.py", "10")]
+        assert entry.comment == "Used in 4 locations, only the first 2 are listed"
+
+    def test_limit_occurrences_below_limit(self):
+        entry = POEntry(msgid="A", occurrences=[("a.py", "1")])
+        entry.limit_occurrences(2)
+        assert entry.occurrences == [("a.py", "1")]
+        assert entry.comment == ""
+
     def test_read_config(self):
         assert ".html" not in EXTENSIONS
 
         register_extractors()
         read_config(open("tests/data/test_config.cfg"))
         assert EXTENSIONS[".html"] == "xml"
+
+
+class Test_walk_directory:
+    OLD_MTIME_NS = 1_000_000_000_000_000_000
+
+    def make_tree(self, root):
+        (root / "pkg" / "sub").mkdir(parents=True)
+        (root / "pkg" / "a.py").write_text("")
+        (root / "pkg" / "sub" / "b.py").write_text("")
+        (root / "c.py").write_text("")
+        for path in (root, root / "pkg", root / "pkg" / "sub"):
+            os.utime(path, ns=(self.OLD_MTIME_NS, self.OLD_MTIME_NS))
+
+    def test_same_result_as_os_walk(self, tmp_path):
+        self.make_tree(tmp_path)
+        expected = [(dirpath, filenames) for dirpath, _, filenames in os.walk(tmp_path)]
+        snapshot = DirectorySnapshot(str(tmp_path / "snapshot.json"))
+        assert list(walk_directory(str(tmp_path), snapshot)) == [
+            (str(dirpath), filenames) for dirpath, filenames in expected
+        ]
+
+    def test_reuse_listing_for_unchanged_directory(self, tmp_path):
+        root = tmp_path / "src"
+        root.mkdir()
+        self.make_tree(root)
+        path = str(tmp_path / "snapshot.json")
+        snapshot = DirectorySnapshot(path)
+        list(walk_directory(str(root), snapshot))
+        snapshot.save()
+
+        # Sneak a file in without changing the directory mtime.
+        (root / "pkg" / "new.py").write_text("")
+        os.utime(root / "pkg", ns=(self.OLD_MTIME_NS, self.OLD_MTIME_NS))
+        listing = dict(walk_directory(str(root), DirectorySnapshot(path)))
+        assert "new.py" not in listing[os.path.join(str(root), "pkg")]
+
+        listing = dict(walk_directory(str(root), DirectorySnapshot(path, rescan=True)))
+        assert "new.py" in listing[os.path.join(str(root), "pkg")]
+
+    def test_rescan_changed_directory(self, tmp_path):
+        root = tmp_path / "src"
+        root.mkdir()
+        self.make_tree(root)
+        path = str(tmp_path / "snapshot.json")
+        snapshot = DirectorySnapshot(path)
+        list(walk_directory(str(root), snapshot))
+        snapshot.save()
+
+        (root / "pkg" / "sub" / "new.py").write_text("")
+        listing = dict(walk_directory(str(root), DirectorySnapshot(path)))
+        assert "new.py" in listing[os.path.join(str(root), "pkg", "sub")]
+
+    def test_ignore_invalid_snapshot(self, tmp_path):
+        path = tmp_path / "snapshot.json"
+        path.write_text("not json")
+        assert DirectorySnapshot(str(path)).previous == {}
+
+
+class TestPOFile_sort_by_location:
+    def build_catalog(self, messages):
+        catalog = POFile()
+        catalog.record_locations()
+        for msgid, filename, lineno in messages:
+            catalog.add_message(Message(None, msgid, None, [], "", "", (filename, lineno)))
+        return catalog
+
+    def test_same_order_as_sorting(self):
+        rng = random.Random(42)
+        files = [f"dir/file{i}.py" for i in range(8)]
+        messages = []
+        for filename in files:
+            lineno = 0
+            for _ in range(40):
+                # Mostly in file order, with some duplicate lines and jumps back.
+                lineno = max(1, lineno + rng.choice([0, 1, 1, 2, 5, -3]))
+                messages.append((f"msg {rng.randrange(60)}", filename, lineno))
+        catalog = self.build_catalog(messages)
+        expected = sorted(catalog, key=_location_sort_key)
+        catalog.sort_by_location()
+        assert [e.msgid for e in catalog] == [e.msgid for e in expected]
+
+    def test_tie_on_first_location(self):
+        catalog = self.build_catalog(
+            [
+                ("A", "a.py", 1),
+                ("B", "a.py", 1),
+                ("A", "b.py", 1),
+            ]
+        )
+        catalog.sort_by_location()
+        assert [e.msgid for e in catalog] == ["B", "A"]
+
+    def test_numeric_line_order(self):
+        catalog = self.build_catalog([("A", "a.py", 10), ("B", "a.py", 9)])
+        catalog.sort_by_location()
+        assert [e.msgid for e in catalog] == ["B", "A"]
+
+
+class Test_match_output:
+    def test_directory_prefix(self):
+        targets = parse_output_map(["src/pkg1=pkg1.pot", "./src/pkg2/=pkg2.pot"])
+        assert match_output("src/pkg1/a.py", targets) == "pkg1.pot"
+        assert match_output("./src/pkg2/sub/b.py", targets) == "pkg2.pot"
+        assert match_output("src/pkg10/a.py", targets) is None
+
+    def test_glob(self):
+        targets = parse_output_map(["src/*/templates/*=templates.pot", "src=other.pot"])
+        assert match_output("src/pkg/templates/a.pt", targets) == "templates.pot"
+        assert match_output("src/pkg/a.py", targets) == "other.pot"
+
+    def test_first_match_wins(self):
+        targets = parse_output_map(["src=all.pot", "src/pkg=pkg.pot"])
+        assert match_output("src/pkg/a.py", targets) == "all.pot"
+
+
+def test_extract_output_map(tmp_path, capsys):
+    for pkg in ("pkg1", "pkg2"):
+        (tmp_path / pkg).mkdir()
+        (tmp_path / pkg / "a.py").write_text(f"_('Message from {pkg}')\n_('Shared')\n")
+    outputs = [
+        f"{tmp_path / pkg}={tmp_path / pkg / 'locale' / pkg}.pot" for pkg in ("pkg1", "pkg2")
+    ]
+    extract(
+        sources=[str(tmp_path)],
+        output_map=outputs,
+        keywords=[],
+        cfg_file=open("tests/data/test_config.cfg"),
+    )
+
+    pkg1 = polib.pofile(str(tmp_path / "pkg1" / "locale" / "pkg1.pot"))
+    pkg2 = polib.pofile(str(tmp_path / "pkg2" / "locale" / "pkg2.pot"))
+    assert [e.msgid for e in pkg1] == ["Message from pkg1", "Shared"]
+    assert [e.msgid for e in pkg2] == ["Message from pkg2", "Shared"]
+
+    (tmp_path / "pkg2" / "a.py").write_text("_('Changed')\n")
+    capsys.readouterr()
+    extract(
+        sources=[str(tmp_path)],
+        output_map=outputs,
+        keywords=[],
+        cfg_file=open("tests/data/test_config.cfg"),
+    )
+    assert (
+        "not replacing " + str(tmp_path / "pkg1" / "locale" / "pkg1.pot")
+        in capsys.readouterr().out
+    )
+    pkg2 = polib.pofile(str(tmp_path / "pkg2" / "locale" / "pkg2.pot"))
+    assert [e.msgid for e in pkg2] == ["Changed"]
+
+
+def test_extract_output_map_unmatched(tmp_path, capsys):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "a.py").write_text("_('Message')\n")
+    (tmp_path / "page.pt").write_text(
+        '<p xmlns:i18n="http://xml.zope.org/namespaces/i18n" i18n:translate="">Page</p>\n'
+    )
+    options = {
+        "sources": [str(tmp_path)],
+        "output_map": [f"{tmp_path / 'pkg'}={tmp_path / 'pkg.pot'}"],
+        "keywords": [],
+    }
+    extract(**options)
+    assert f"No output for {tmp_path / 'page.pt'}, skipping" in capsys.readouterr().err
+    extract(quiet=True, **options)
+    assert "No output for" not in capsys.readouterr().err
+
+
+def test_extract_jsonl(tmp_path, capsys):
+    (tmp_path / "a.py").write_text(
+        "# Comment\n_('Hello %s')\nngettext('One', '%d cows', n)\npgettext('ctx', 'Hello')\n"
+    )
+    output = str(tmp_path / "messages.jsonl")
+    for _ in range(2):
+        extract(
+            sources=[str(tmp_path / "a.py")],
+            output=output,
+            output_format="jsonl",
+            keywords=[],
+            cfg_file=open("tests/data/test_config.cfg"),
+        )
+    assert "No changes found" in capsys.readouterr().out
+    with open(output, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f]
+    filename = os.path.join(str(tmp_path), "a.py")
+    assert entries == [
+        {
+            "msgctxt": None,
+            "msgid": "Hello %s",
+            "msgid_plural": None,
+            "flags": ["c-format"],
+            "comments": ["Comment"],
+            "occurrences": [[filename, 2]],
+        },
+        {
+            "msgctxt": None,
+            "msgid": "One",
+            "msgid_plural": "%d cows",
+            "flags": [],
+            "comments": [],
+            "occurrences": [[filename, 3]],
+        },
+        {
+            "msgctxt": "ctx",
+            "msgid": "Hello",
+            "msgid_plural": None,
+            "flags": [],
+            "comments": [],
+            "occurrences": [[filename, 4]],
+        },
+    ]
+
+
+def test_extract_check(tmp_path, capsys):
+    source = tmp_path / "a.py"
+    source.write_text("_('Hello')\n_('World')\n")
+    output = tmp_path / "messages.pot"
+    options = {
+        "sources": [str(source)],
+        "output": str(output),
+        "keywords": [],
+        "cfg_file": open("tests/data/test_config.cfg"),
+    }
+    extract(**options)
+    mtime = output.stat().st_mtime_ns
+    extract(check=True, **options)
+    assert "messages.pot is up to date" in capsys.readouterr().out
+
+    source.write_text("_('Hello')\n_('New')\n_('World')\n")
+    with pytest.raises(SystemExit) as exc:
+        extract(check=True, **options)
+    assert exc.value.code == 1
+    assert f'+ msgid "New"  ({source}:2)' in capsys.readouterr().err
+
+    source.write_text("_('Hello')\n\n_('World')\n")
+    with pytest.raises(SystemExit) as exc:
+        extract(check=True, **options)
+    assert exc.value.code == 1
+    assert capsys.readouterr().err.splitlines()[1:] == ['~ msgid "World"']
+
+    source.write_text("_('Hello')\n")
+    with pytest.raises(SystemExit):
+        extract(check=True, **options)
+    assert capsys.readouterr().err.splitlines()[1:] == ['- msgid "World"']
+    assert output.stat().st_mtime_ns == mtime
+
+
+def test_extract_check_mixed_comments(tmp_path, capsys):
+    source = tmp_path / "a.py"
+    source.write_text(
+        "_('Edit')\n# TRANSLATORS: c1\n_('Edit')\n# TRANSLATORS: c2\n_('Save')\n_('Save')\n"
+    )
+    output = tmp_path / "messages.pot"
+    options = {"sources": [str(source)], "output": str(output), "keywords": []}
+    extract(**options)
+    extract(check=True, **options)
+    assert "messages.pot is up to date" in capsys.readouterr().out
+
+
+def test_extract_check_missing_output(tmp_path, capsys):
+    source = tmp_path / "a.py"
+    source.write_text("_('Hello')\n")
+    with pytest.raises(SystemExit):
+        extract(
+            sources=[str(source)],
+            output=str(tmp_path / "messages.pot"),
+            keywords=[],
+            cfg_file=open("tests/data/test_config.cfg"),
+            check=True,
+        )
+    assert "Can not read" in capsys.readouterr().err
+    assert not (tmp_path / "messages.pot").exists()
+
+
+@pytest.mark.parametrize(
+    "backend",
+    [
+        "thread",
+        "process",
+        pytest.param(
+            "interpreter",
+            marks=pytest.mark.skipif(
+                not backend_available("interpreter"), reason="Needs InterpreterPoolExecutor"
+            ),
+        ),
+    ],
+)
+def test_extract_jobs(tmp_path, backend):
+    for i in range(20):
+        (tmp_path / f"{i:02}.py").write_text(f"_('Shared')\n_('Message {i}')\n")
+    (tmp_path / "page.html").write_text(
+        '<p xmlns:i18n="http://xml.zope.org/namespaces/i18n" i18n:domain="test"'
+        ' i18n:translate="">Template</p>\n'
+    )
+    outputs = []
+    for jobs in (1, 4):
+        output = tmp_path / "output" / f"jobs{jobs}.pot"
+        extract(
+            sources=[str(tmp_path)],
+            output=str(output),
+            keywords=[],
+            jobs=jobs,
+            backend=backend,
+            cfg_file=open("tests/data/test_config.cfg"),
+        )
+        outputs.append([(e.msgid, e.occurrences) for e in polib.pofile(str(output))])
+    assert outputs[0] == outputs[1]
+    assert ("Template", [(str(tmp_path / "page.html"), "1")]) in outputs[1]
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_extract_jobs_large_python_file(tmp_path, backend):
+    source = "".join(f"def view_{i}():\n    return _('Message {i}')\n\n" for i in range(40))
+    (tmp_path / "a.py").write_text(source)
+    (tmp_path / "b.py").write_text("_('Other')\n")
+    config = tmp_path / "lingva.cfg"
+    config.write_text("[extractor:python]\njobs = 2\n")
+    output = tmp_path / "messages.pot"
+    with mock.patch("lingva.extractors.python.PARALLEL_MIN_SIZE", 0):
+        # Forked worker processes inherit the patches.
+        with mock.patch(
+            "lingva.extractors.python._extract_parallel",
+            side_effect=AssertionError("Nested pool"),
+        ) as extract_parallel:
+            extract(
+                sources=[str(tmp_path)],
+                output=str(output),
+                keywords=[],
+                cfg_file=open(config),
+                jobs=2,
+                backend=backend,
+            )
+    extract_parallel.assert_not_called()
+    assert len(polib.pofile(str(output))) == 41
+
+
+def test_extract_timeout_keep_going(tmp_path, capsys, monkeypatch):
+    class HangingExtractor(Extractor):
+        extensions = [".hang"]
+
+        def __call__(self, filename, options):
+            while True:
+                pass
+
+    monkeypatch.setitem(EXTRACTORS, "hanging", HangingExtractor())
+    monkeypatch.setitem(EXTENSIONS, ".hang", "hanging")
+    (tmp_path / "a.py").write_text("_('Hello')\n")
+    (tmp_path / "b.hang").write_text("")
+    output = tmp_path / "messages.pot"
+    options = {
+        "sources": [str(tmp_path)],
+        "output": str(output),
+        "keywords": [],
+        "timeout": 0.1,
+    }
+    with pytest.raises(SystemExit):
+        extract(**options)
+    assert not output.exists()
+    with pytest.raises(SystemExit) as exc:
+        extract(keep_going=True, **options)
+    assert exc.value.code == 1
+    err = capsys.readouterr().err
+    assert f"Aborted extracting {tmp_path / 'b.hang'} after 0." in err
+    assert "Skipped 1 files" in err
+    assert [e.msgid for e in polib.pofile(str(output))] == ["Hello"]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_extract_keep_going_undecodable(tmp_path, capsys, jobs):
+    (tmp_path / "a.py").write_text("_('Hello')\n")
+    (tmp_path / "b.py").write_bytes(b"_('\xff')\n")
+    output = tmp_path / "messages.pot"
+    options = {"sources": [str(tmp_path)], "output": str(output), "keywords": [], "jobs": jobs}
+    with pytest.raises(UnicodeDecodeError):
+        extract(**options)
+    with pytest.raises(SystemExit) as exc:
+        extract(keep_going=True, **options)
+    assert exc.value.code == 1
+    err = capsys.readouterr().err
+    assert f"Skipping {tmp_path / 'b.py'}: 'utf-8' codec can't decode" in err
+    assert "Skipped 1 files" in err
+    assert [e.msgid for e in polib.pofile(str(output))] == ["Hello"]
+
+
+def test_extract_timeout_thread_workers(tmp_path, capsys):
+    (tmp_path / "a.py").write_text("_('Hello')\n")
+    output = tmp_path / "messages.pot"
+    extract(sources=[str(tmp_path)], output=str(output), keywords=[], jobs=2, timeout=10)
+    assert "--timeout can not interrupt thread workers" in capsys.readouterr().err
+
+
+def test_extract_index(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "a.py").write_text("_('Hello')\n_('World')\n")
+    (tmp_path / "b.py").write_text("\n_('Hello')\n")
+    options = {"sources": ["."], "keywords": [], "index": "index.sqlite", "quiet": True}
+    extract(**options)
+    with MessageIndex("index.sqlite", readonly=True) as index:
+        assert index.occurrences("Hello") == [("a.py", 1), ("b.py", 2)]
+        assert index.messages("a.py") == [(None, "Hello"), (None, "World")]
+    (tmp_path / "b.py").unlink()
+    (tmp_path / "a.py").write_text("_('World')\n")
+    extract(**options)
+    with MessageIndex("index.sqlite", readonly=True) as index:
+        assert index.occurrences("Hello") == []
+        assert index.occurrences("World") == [("a.py", 1)]
+
+
+def test_extract_index_without_locations(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "page.pt").write_text(
+        '<html xmlns:i18n="http://xml.zope.org/namespaces/i18n" i18n:domain="test">\n'
+        "  <body>\n"
+        "    <p>\n"
+        '      <span i18n:translate="">Hello</span>\n'
+        "    </p>\n"
+        '    <span i18n:translate="">World</span>\n'
+        "  </body>\n"
+        "</html>\n"
+    )
+    extract(
+        sources=["."],
+        keywords=[],
+        index="index.sqlite",
+        location=False,
+        output="out.pot",
+        quiet=True,
+    )
+    with MessageIndex("index.sqlite", readonly=True) as index:
+        assert index.occurrences("Hello") == [("page.pt", 4)]
+        assert index.occurrences("World") == [("page.pt", 6)]
+    assert all(not entry.occurrences for entry in polib.pofile("out.pot"))
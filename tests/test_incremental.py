@@ -0,0 +1,72 @@
+from unittest import mock
+
+import pytest
+
+from lingva import incremental
+from lingva.aio import ExtractionError
+from lingva.incremental import extract_buffer
+
+SOURCE = """\
+import os
+
+
+def view(request):
+    # I18N: The page title
+    return _("Title")
+
+
+def other(request):
+    return _("Other")
+"""
+
+
+def test_extract_buffer():
+    result = extract_buffer("views.py", SOURCE)
+    assert [(m.msgid, m.comment, m.location) for m in result.messages] == [
+        ("Title", "I18N: The page title", ("views.py", 6)),
+        ("Other", "", ("views.py", 10)),
+    ]
+    assert result.added == result.messages
+    assert result.removed == []
+
+
+def test_extract_buffer_reuses_unchanged_parts():
+    previous = extract_buffer("views.py", SOURCE)
+    with mock.patch.object(
+        incremental, "_extract_text", side_effect=incremental._extract_text
+    ) as extract_text:
+        result = extract_buffer("views.py", SOURCE.replace("Other", "Changed"), previous)
+    assert extract_text.call_count == 1
+    assert [m.msgid for m in result.added] == ["Changed"]
+    assert [m.msgid for m in result.removed] == ["Other"]
+
+
+def test_extract_buffer_moved_messages():
+    previous = extract_buffer("views.py", SOURCE)
+    result = extract_buffer("views.py", "\n" + SOURCE, previous)
+    assert [m.location for m in result.added] == [("views.py", 7), ("views.py", 11)]
+    assert [m.location for m in result.removed] == [("views.py", 6), ("views.py", 10)]
+
+
+def test_extract_buffer_template():
+    template = (
+        '<p xmlns:i18n="http://xml.zope.org/namespaces/i18n" i18n:domain="test"'
+        ' i18n:translate="">Template</p>\n'
+    )
+    result = extract_buffer("page.pt", template)
+    assert [m.msgid for m in result.messages] == ["Template"]
+    result = extract_buffer("page.pt", template, result)
+    assert result.added == result.removed == []
+
+
+def test_extract_buffer_parse_error():
+    previous = extract_buffer("views.py", SOURCE)
+    with pytest.raises(ExtractionError):
+        extract_buffer("views.py", SOURCE.replace('_("Other")', '_("Other" 1)'), previous)
+    result = extract_buffer("views.py", SOURCE, previous)
+    assert result.added == result.removed == []
+
+
+def test_extract_buffer_without_extractor():
+    with pytest.raises(ExtractionError):
+        extract_buffer("notes.txt", "Some text")
@@ -0,0 +1,59 @@
+import sqlite3
+
+from click.testing import CliRunner
+
+from lingva.extractors import Message
+from lingva.index import MessageIndex, main
+
+
+def message(msgid, line, msgctxt=None):
+    return Message(msgctxt, msgid, None, [], "", "", ("ignored", line))
+
+
+def test_update_file_replaces_messages(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name in ["a.py", "b.py"]:
+        (tmp_path / name).write_text("")
+    with MessageIndex("index.sqlite") as index:
+        index.update_file("a.py", [message("One", 1), message("Two", 2)], "python")
+        index.update_file("./b.py", [message("One", 5), message("One", 3, "menu")], "python")
+    with MessageIndex("index.sqlite") as index:
+        assert index.occurrences("One") == [("a.py", 1), ("b.py", 5)]
+        assert index.occurrences("One", "menu") == [("b.py", 3)]
+        index.update_file("a.py", [message("Three", 1)], "python")
+        assert index.messages("a.py") == [(None, "Three")]
+    connection = sqlite3.connect("index.sqlite")
+    assert sorted(connection.execute("SELECT msgid FROM messages")) == [
+        ("One",),
+        ("One",),
+        ("Three",),
+    ]
+
+
+def test_prune_removed_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "a.py").write_text("")
+    with MessageIndex("index.sqlite") as index:
+        index.update_file("a.py", [message("One", 1)], "python")
+        index.update_file("gone.py", [message("Two", 1)], "python")
+    with MessageIndex("index.sqlite", readonly=True) as index:
+        assert index.messages("gone.py") == []
+        assert index.occurrences("Two") == []
+
+
+def test_query(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "a.py").write_text("")
+    with MessageIndex("index.sqlite") as index:
+        index.update_file("a.py", [message("One", 1), message("Two", 4, "menu")], "python")
+    runner = CliRunner()
+    result = runner.invoke(main, ["index.sqlite", "One"])
+    assert result.exit_code == 0 and result.output == "a.py:1\n"
+    result = runner.invoke(main, ["index.sqlite", "--file", "a.py"])
+    assert result.output == "One\n[menu] Two\n"
+    result = runner.invoke(main, ["index.sqlite", "--file", "./a.py"])
+    assert result.output == "One\n[menu] Two\n"
+    assert runner.invoke(main, ["index.sqlite", "Missing"]).exit_code == 1
+    assert runner.invoke(main, ["index.sqlite"]).exit_code == 2
+    (tmp_path / "other.sqlite").write_text("not a database")
+    assert runner.invoke(main, ["other.sqlite", "One"]).exit_code == 1
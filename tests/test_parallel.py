@@ -0,0 +1,106 @@
+import os
+import threading
+
+import pytest
+
+from lingva.extract import ExtractorOptions
+from lingva.extractors import Message
+from lingva.extractors.python import PythonExtractor
+from lingva.extractors.zcml import ZCMLExtractor
+from lingva.parallel import (
+    extract_batch,
+    imap_ordered,
+    pack_messages,
+    plan_batches,
+    unpack_messages,
+)
+
+
+def test_results_in_order():
+    results = list(imap_ordered(lambda i: i * 2, range(100), jobs=4))
+    assert results == [(i, i * 2) for i in range(100)]
+
+
+def test_submits_within_window():
+    submitted = []
+    lock = threading.Lock()
+
+    def items():
+        for i in range(20):
+            with lock:
+                submitted.append(i)
+            yield i
+
+    results = imap_ordered(lambda i: i, items(), jobs=2, window=3)
+    assert next(results) == (0, 0)
+    assert len(submitted) <= 4
+    results.close()
+
+
+def test_exception_raised_in_consumer():
+    def func(i):
+        if i == 5:
+            raise SystemExit(1)
+        return i
+
+    with pytest.raises(SystemExit):
+        list(imap_ordered(func, range(100), jobs=4))
+
+
+def test_pack_messages():
+    messages = [
+        Message(None, "One", "Many", ["c-format"], "Comment", "", ("a.py", 3)),
+        Message("ctx", "Two", None, [], "", "", ("a.py", 5)),
+    ]
+    packed = pack_messages(messages)
+    assert all(type(value) in (str, int, type(None), tuple) for m in packed for value in m)
+    assert unpack_messages(packed) == messages
+
+
+def test_plan_batches():
+    costs = [1, 100, 1, 1, 50, 1, 1, 1]
+    batches = plan_batches(costs, jobs=1)
+    assert batches[0] == [1]
+    assert batches[1] == [4]
+    assert sorted(i for batch in batches for i in batch) == list(range(len(costs)))
+    assert all(len(batch) > 1 for batch in batches[2:])
+
+
+def test_scheduled_results_in_order():
+    started = []
+
+    def func(i):
+        started.append(i)
+        return i * 2
+
+    results = list(imap_ordered(func, range(100), jobs=1, cost=lambda i: i))
+    assert results == [(i, i * 2) for i in range(100)]
+    assert started[0] == 99
+
+
+def test_scheduled_exception_raised_in_consumer():
+    def func(i):
+        if i == 5:
+            raise SystemExit(1)
+        return i
+
+    with pytest.raises(SystemExit):
+        list(imap_ordered(func, range(100), jobs=4, cost=lambda i: 1))
+
+
+def test_extract_batch(tmp_path):
+    (tmp_path / "a.py").write_text("_('Python')\n")
+    (tmp_path / "b.zcml").write_text('<configure i18n_domain="x"><a title="ZCML"/></configure>')
+    (tmp_path / "c.py").write_text("_('Python again')\n")
+    extractors = {".py": PythonExtractor(), ".zcml": ZCMLExtractor()}
+    options = ExtractorOptions(comment_tag=True, domain=None, keywords=[])
+    results = extract_batch(
+        [str(tmp_path / name) for name in ("a.py", "b.zcml", "c.py")],
+        lambda filename: extractors[os.path.splitext(filename)[1]],
+        options,
+    )
+    assert [([m.msgid for m in messages], problem) for (messages, problem) in results] == [
+        (["Python"], None),
+        (["ZCML"], None),
+        (["Python again"], None),
+    ]
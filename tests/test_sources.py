@@ -0,0 +1,39 @@
+import mmap
+
+import pytest
+
+from lingva.sources import SourceBuffer
+
+
+@pytest.mark.parametrize("threshold", [1, 1024])
+def test_read(tmp_path, threshold):
+    filename = tmp_path / "a.py"
+    filename.write_bytes("_('Ünïcödé')\r\nx = 1\n".encode())
+    with SourceBuffer(str(filename), mmap_threshold=threshold) as source:
+        assert isinstance(source.data, mmap.mmap) == (threshold == 1)
+        assert len(source) == 24
+        binary = source.open()
+        text = source.open("r")
+        assert binary.read() == filename.read_bytes()
+        assert text.readline() == "_('Ünïcödé')\n"
+        assert text.readline() == "x = 1\n"
+    assert binary.closed
+    assert text.closed
+    if threshold == 1:
+        assert source.data.closed
+
+
+def test_empty_file(tmp_path):
+    filename = tmp_path / "empty.py"
+    filename.write_bytes(b"")
+    with SourceBuffer(str(filename), mmap_threshold=0) as source:
+        assert source.data == b""
+        assert source.open("r").read() == ""
+
+
+def test_invalid_mode(tmp_path):
+    filename = tmp_path / "a.py"
+    filename.write_bytes(b"")
+    with SourceBuffer(str(filename)) as source:
+        with pytest.raises(ValueError):
+            source.open("w")
@@ -0,0 +1,105 @@
+import polib
+import pytest
+from click.testing import CliRunner
+
+from lingva.parallel import backend_available
+from lingva.unused import find_unused, list_po_files, main
+
+PO = """\
+msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\\n"
+
+msgid "Hello"
+msgstr "Hallo"
+
+msgctxt "menu"
+msgid "Hello"
+msgstr "Hallo!"
+
+msgid "Gone"
+msgstr "Weg"
+
+#~ msgid "Obsolete"
+#~ msgstr "Veraltet"
+"""
+
+
+WRAPPED_PO = """\
+#
+msgid ""
+msgstr "Content-Type: text/plain; charset=UTF-8\\n"
+
+#: src/package/module_1.py:1 src/package/module_2.py:2
+#: src/package/module_3.py:3 src/package/module_4.py:4
+msgid ""
+"A long message that is used in a lot of places, so it has to be wrapped over "
+"several lines"
+msgstr ""
+"Eine lange Nachricht, die an vielen Stellen verwendet wird und deshalb über "
+"mehrere Zeilen umbrochen werden muss"
+
+msgid "Gone"
+msgstr "Weg"
+
+# A translator comment that is quite a bit longer than seventy eight characters
+msgid "Hello"
+msgstr "Hallo"
+"""
+
+
+def make_tree(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.py").write_text("_('Hello')\n")
+    for lang in ["de", "nl"]:
+        directory = tmp_path / "locale" / lang / "LC_MESSAGES"
+        directory.mkdir(parents=True)
+        (directory / "app.po").write_text(PO)
+        (directory / "other.po").write_text(PO)
+
+
+def test_list_po_files(tmp_path):
+    make_tree(tmp_path)
+    names = [p[len(str(tmp_path)) + 1 :] for p in list_po_files(str(tmp_path / "locale"), "app")]
+    assert names == ["locale/de/LC_MESSAGES/app.po", "locale/nl/LC_MESSAGES/app.po"]
+    assert len(list_po_files(str(tmp_path / "locale"))) == 4
+
+
+def test_find_unused(tmp_path):
+    make_tree(tmp_path)
+    filename = str(tmp_path / "locale" / "de" / "LC_MESSAGES" / "app.po")
+    live = {("Hello", None)}
+    assert find_unused(filename, live) == [("Hello", "menu"), ("Gone", None), ("Obsolete", None)]
+    assert find_unused(filename, live, prune=True)
+    assert [e.msgid for e in polib.pofile(filename)] == ["Hello"]
+    assert find_unused(filename, live) == []
+
+
+def test_prune_keeps_wrapping(tmp_path):
+    filename = tmp_path / "app.po"
+    filename.write_text(WRAPPED_PO, encoding="utf-8")
+    live = {(entry.msgid, None) for entry in polib.pofile(str(filename))} - {("Gone", None)}
+    assert find_unused(str(filename), live, prune=True) == [("Gone", None)]
+    assert filename.read_text(encoding="utf-8") == WRAPPED_PO.replace(
+        'msgid "Gone"\nmsgstr "Weg"\n\n', ""
+    )
+
+
+@pytest.mark.parametrize("jobs,backend", [(1, "thread"), (2, "thread"), (2, "process")])
+def test_main(tmp_path, monkeypatch, jobs, backend):
+    if not backend_available(backend):
+        pytest.skip(f"{backend} backend not available")
+    make_tree(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    args = ["-d", "app", "-j", str(jobs), "--backend", backend, "locale", "src"]
+    result = CliRunner().invoke(main, args)
+    assert result.exit_code == 1
+    assert result.output.splitlines()[:3] == [
+        'locale/de/LC_MESSAGES/app.po: msgctxt "menu" msgid "Hello"',
+        'locale/de/LC_MESSAGES/app.po: msgid "Gone"',
+        'locale/de/LC_MESSAGES/app.po: msgid "Obsolete"',
+    ]
+    result = CliRunner().invoke(main, ["--prune"] + args)
+    assert result.exit_code == 0
+    assert CliRunner().invoke(main, args).exit_code == 0
+    assert len(polib.pofile("locale/nl/LC_MESSAGES/other.po")) == 4
@@ -0,0 +1,95 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+from lingva.extractors import Extractor, Message
+from lingva.watchdog import FileTimeout, extract_files_within, time_budget
+
+
+class SlowExtractor(Extractor):
+    extensions = [".slow"]
+
+    def __call__(self, filename, options):
+        start = time.monotonic()
+        while time.monotonic() - start < options.duration:
+            pass
+        return [Message(None, "Slow", None, [], "", "", (filename, 1))]
+
+
+def test_time_budget():
+    with pytest.raises(FileTimeout):
+        with time_budget(0.05) as enforced:
+            assert enforced
+            while True:
+                pass
+    with time_budget(1) as enforced:
+        pass
+
+
+def test_extract_files_within_timeout():
+    options = mock.Mock(duration=10)
+    [(messages, problem)] = extract_files_within(
+        SlowExtractor(), ["a.slow"], options, timeout=0.05
+    )
+    assert messages is None
+    assert problem.startswith("Aborted extracting a.slow after 0.")
+
+
+def test_extract_files_within_thread_not_interrupted():
+    options = mock.Mock(duration=0.1)
+    result = []
+    thread = threading.Thread(
+        target=lambda: result.extend(
+            extract_files_within(SlowExtractor(), ["a.slow"], options, timeout=0.05)
+        )
+    )
+    thread.start()
+    thread.join()
+    [(messages, problem)] = result
+    assert [m.msgid for m in messages] == ["Slow"]
+    assert "longer than the 0.05 second limit" in problem
+
+
+class BrokenExtractor(Extractor):
+    extensions = [".broken"]
+
+    def __call__(self, filename, options):
+        if "broken" in filename:
+            raise SystemExit(1)
+        if "invalid" in filename:
+            raise ValueError("invalid input")
+        return [Message(None, filename, None, [], "", "", (filename, 1))]
+
+
+def test_extract_files_within_keep_going():
+    with pytest.raises(SystemExit):
+        list(extract_files_within(BrokenExtractor(), ["a.broken"], mock.Mock()))
+    assert list(
+        extract_files_within(BrokenExtractor(), ["a.broken"], mock.Mock(), keep_going=True)
+    ) == [(None, "Skipping a.broken because of errors")]
+
+
+def test_extract_files_within_continues_after_failure():
+    results = list(
+        extract_files_within(
+            BrokenExtractor(), ["a", "b.broken", "c", "d.broken"], mock.Mock(), keep_going=True
+        )
+    )
+    assert [None if messages is None else messages[0].msgid for messages, _ in results] == [
+        "a",
+        None,
+        "c",
+        None,
+    ]
+
+
+def test_extract_files_within_keep_going_exception():
+    with pytest.raises(ValueError):
+        list(extract_files_within(BrokenExtractor(), ["a.invalid"], mock.Mock()))
+    results = list(
+        extract_files_within(BrokenExtractor(), ["a.invalid", "b"], mock.Mock(), keep_going=True)
+    )
+    assert results[0] == (None, "Skipping a.invalid: invalid input")
+    assert results[1][0][0].msgid == "b"
@@ -0,0 +1,75 @@
+import random
+
+import polib
+import pytest
+
+from lingva.extract import POEntry, create_catalog
+from lingva.writer import iter_po, wrap_width, wrap_words
+
+WIDTHS = [-1, 0, 10, 20, 40, 79, 120]
+
+
+def make_catalog(width):
+    catalog = create_catalog(width, "Acme", "package", "1.0", "bugs@example.com")
+    catalog.append(POEntry(msgid="Short", occurrences=[("a.py", "1")]))
+    catalog.append(
+        POEntry(
+            msgid="A rather long message that needs to be wrapped when the width is small",
+            msgctxt="a-context with-hyphens",
+            flags=["python-format", "c-format"],
+            occurrences=[(f"some-dir/sub-dir/file{i}.py", str(i * 7)) for i in range(30)],
+        )
+    )
+    catalog.append(POEntry(msgid='Quotes " and \\ backslash\tand tab', occurrences=[("b.py", "")]))
+    catalog.append(POEntry(msgid="Two\nlines", occurrences=[("dir with spaces/c.py", "3")]))
+    catalog.append(POEntry(msgid="Line separator"))
+    catalog.append(POEntry(msgid="Stars in *names*", occurrences=[("x*.py", "1"), ("y.py", "2")]))
+    entry = POEntry(msgid="One cow", msgid_plural="%d cows with a long plural form for wrapping")
+    entry.msgstr_plural[0] = ""
+    entry.msgstr_plural[1] = ""
+    catalog.append(entry)
+    entry = POEntry(msgid="Ünïcödé")
+    entry._comments.append("A long extracted comment - with a dash - that wraps at small widths")
+    entry._comments.append("Second comment")
+    entry._tcomments.append("Translator comment")
+    catalog.append(entry)
+    catalog.append(POEntry(msgid="Obsolete", obsolete=True))
+    return catalog
+
+
+@pytest.mark.parametrize("width", WIDTHS)
+def test_same_output_as_polib(width):
+    catalog = make_catalog(width)
+    assert "".join(iter_po(catalog)) == catalog.__unicode__()
+
+
+@pytest.mark.parametrize("width", WIDTHS)
+def test_random_entries_same_output_as_polib(width):
+    rng = random.Random(width)
+    alphabet = 'abc de-f  g\\"\n\t*:/.'
+    catalog = create_catalog(width, None, "package", "1.0", None)
+    for i in range(200):
+        msgid = "".join(rng.choice(alphabet) for _ in range(rng.randrange(60)))
+        occurrences = [
+            ("".join(rng.choice("ab-/c.") for _ in range(rng.randrange(1, 15))), str(n))
+            for n in range(rng.randrange(12))
+        ]
+        catalog.append(POEntry(msgid=f"{i} {msgid}", occurrences=occurrences))
+    assert "".join(iter_po(catalog)) == catalog.__unicode__()
+
+
+def test_wrap_words():
+    assert wrap_words(["aaa", "bb", "c", "dddddd"], 6) == ["aaa bb", "c", "dddddd"]
+    assert wrap_words(["toolongword", "a"], 4) == ["toolongword", "a"]
+
+
+@pytest.mark.parametrize("width", [0, 10, 20, 40, 79, 120])
+def test_wrap_width(width):
+    catalog = make_catalog(width)
+    # polib reads a line separator in a field as a line break.
+    catalog[:] = [entry for entry in catalog if "\u2028" not in entry.msgid]
+    text = "".join(iter_po(catalog))
+    catalog = polib.pofile(text)
+    catalog.wrapwidth = wrap_width(text)
+    # polib does not read back the empty first line of the header comment.
+    assert "".join(iter_po(catalog)).split("\n")[1:] == text.split("\n")[2:]